@@ -1,13 +1,16 @@
 from typing import Any, List, Dict
 from datetime import datetime
+import asyncio
 import uuid
 import json
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.schemas.conversation import (
     OpenConversationRequest,
+    OpenConversationBatchRequest,
+    OpenConversationBatchItem,
     OpenConversationResponse, 
     AddMessageRequest,
     AddMessageResponse,
@@ -18,6 +21,7 @@ from app.services.conversation import conversation_service
 from app.core.agent import (
     process_enem_question,
     add_message_to_conversation,
+    stream_message_to_conversation,
     get_or_create_session
 )
 from app.core.logging_config import get_logger
@@ -26,6 +30,9 @@ logger = get_logger(__name__)
 
 router = APIRouter()
 
+# Appended to a streamed answer when the agent fails after the response has started
+STREAM_ERROR_MARKER = "\n\n[erro: a resposta foi interrompida]"
+
 
 @router.post("/open", response_model=OpenConversationResponse)
 async def open_conversation(request: OpenConversationRequest) -> OpenConversationResponse:
@@ -127,6 +134,45 @@ async def open_conversation(request: OpenConversationRequest) -> OpenConversatio
         )
 
 
+@router.post("/open/batch", response_model=List[OpenConversationBatchItem])
+async def open_conversations_batch(request: OpenConversationBatchRequest) -> List[OpenConversationBatchItem]:
+    """
+    Start one conversation per ENEM question, processing all questions concurrently.
+    
+    The question and source lookups of concurrent requests are coalesced by the
+    agent into a single MongoDB query, and the agent calls run in parallel.
+    Each question gets its own result, in the order of question_ids, so a failure
+    on one question does not hide the conversations created for the others.
+    """
+    logger.info(f"🎯 Iniciando {len(request.question_ids)} conversas - User: {request.user_id}")
+    
+    results = await asyncio.gather(
+        *(
+            open_conversation(OpenConversationRequest(
+                question_id=question_id,
+                user_id=request.user_id,
+                structured_output=request.structured_output
+            ))
+            for question_id in request.question_ids
+        ),
+        return_exceptions=True
+    )
+    
+    items = []
+    for question_id, result in zip(request.question_ids, results):
+        if isinstance(result, HTTPException):
+            items.append(OpenConversationBatchItem(question_id=question_id, success=False, error=str(result.detail)))
+        elif isinstance(result, Exception):
+            items.append(OpenConversationBatchItem(question_id=question_id, success=False, error=str(result)))
+        elif isinstance(result, BaseException):
+            # Cancellation is not a per-question failure
+            raise result
+        else:
+            items.append(OpenConversationBatchItem(question_id=question_id, success=True, data=result))
+    
+    return items
+
+
 @router.post("/message", response_model=AddMessageResponse)
 async def add_message(request: AddMessageRequest) -> AddMessageResponse:
     """
@@ -228,6 +274,103 @@ async def add_message(request: AddMessageRequest) -> AddMessageResponse:
         )
 
 
+@router.post("/message/stream")
+async def add_message_stream(request: AddMessageRequest) -> StreamingResponse:
+    """
+    Add a message to an existing conversation, streaming the agent's answer.
+    
+    Same flow as /message, but the response body is the agent's text sent in
+    chunks as the model generates it. The full answer is stored in the
+    conversation once the stream ends. Structured output is not streamed.
+    """
+    logger.info(f"💬 Nova mensagem (streaming) - Session: {request.session_id}, User: {request.user_id}")
+    
+    if request.structured_output:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Saída estruturada não é suportada em streaming; use /message"
+        )
+    
+    conversation = await conversation_service.get_conversation_by_session_id(request.session_id)
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Conversa não encontrada para session_id: {request.session_id}"
+        )
+    
+    if conversation.user_id != request.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado: você não é o proprietário desta conversa"
+        )
+    
+    await conversation_service.add_message_to_conversation(
+        session_id=request.session_id,
+        message=MessageModel(
+            role="user",
+            content=request.message,
+            timestamp=datetime.utcnow()
+        )
+    )
+    
+    stream = stream_message_to_conversation(
+        user_id=request.user_id,
+        session_id=request.session_id,
+        message=request.message
+    )
+    
+    # Pull the first chunk before answering so setup errors still map to an HTTP status
+    try:
+        first_chunk = await stream.__anext__()
+    except StopAsyncIteration:
+        first_chunk = ""
+    except Exception as e:
+        logger.error(f"❌ Erro do agente ADK: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro do agente: {str(e)}"
+        )
+    
+    async def body():
+        chunks = [first_chunk] if first_chunk else []
+        if first_chunk:
+            yield first_chunk
+        interrupted = False
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            # Headers (200) were already sent: signal the failure inside the body
+            interrupted = True
+            logger.error(f"❌ Erro do agente ADK durante o streaming - Session: {request.session_id}, Error: {str(e)}")
+            yield STREAM_ERROR_MARKER
+        
+        content = "".join(chunks)
+        if not content:
+            logger.warning(f"⚠️ Resposta vazia do agente (streaming) - Session: {request.session_id}; nada foi salvo")
+            return
+        
+        metadata = {
+            "agent_type": "enem_agent",
+            "structured_output": False
+        }
+        if interrupted:
+            metadata["interrupted"] = True
+        await conversation_service.add_message_to_conversation(
+            session_id=request.session_id,
+            message=MessageModel(
+                role="agent",
+                content=content,
+                timestamp=datetime.utcnow(),
+                metadata=metadata
+            )
+        )
+        logger.info(f"✅ Mensagem (streaming) adicionada à conversa com sucesso")
+    
+    return StreamingResponse(body(), media_type="text/plain; charset=utf-8")
+
+
 @router.get("/history/{session_id}", response_model=ConversationHistoryResponse)
 async def get_conversation_history(session_id: str, user_id: str) -> ConversationHistoryResponse:
     """
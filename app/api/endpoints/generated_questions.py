@@ -109,7 +109,8 @@ async def generate_question(
             source_question=source_question,
             similar_questions=similar_questions,
             user_id=current_user.id,
-            max_refinements=3
+            max_refinements=3,
+            fresh=request.fresh
         )
         
         if not generation_result["success"]:
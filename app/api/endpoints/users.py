@@ -1,15 +1,29 @@
-from typing import Any, List, Annotated
+from typing import Any, Dict, List, Annotated, Optional
+import asyncio
+import hashlib
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app.api.dependencies.auth import get_current_active_user, get_current_active_superuser
-from app.schemas.user import User, UserCreate, UserUpdate, Token
+from app.core.config import settings
+from app.schemas.user import User, UserCreate, UserUpdate, UserListItem, Token
 from app.services.user import user_service
 from app.utils.security import create_access_token
+from app.utils.rate_limit import TokenBucketLimiter
 
 router = APIRouter()
 
+# ObjectId validado na borda: ids malformados retornam 422 sem consultar o banco
+UserId = Annotated[str, Path(pattern=r"^[0-9a-fA-F]{24}$", description="ObjectId do usuário")]
+
+# Limita tentativas de login antes do hash da senha, por IP e por email
+login_limiter = TokenBucketLimiter(
+    capacity=settings.LOGIN_RATE_LIMIT,
+    period=settings.LOGIN_RATE_LIMIT_PERIOD_SECONDS,
+)
+
 
 @router.post("/register", response_model=User)
 def register(user_in: UserCreate) -> Any:
@@ -29,11 +43,21 @@ def register(user_in: UserCreate) -> Any:
 
 @router.post("/login/access-token", response_model=Token)
 def login_access_token(
+    request: Request,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
 ) -> Any:
     """
     OAuth2 login para obter token JWT
     """
+    client_ip = request.client.host if request.client else "unknown"
+    for key in (f"ip:{client_ip}", f"email:{form_data.username.lower()}"):
+        if not login_limiter.allow(key):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Muitas tentativas de login. Tente novamente mais tarde.",
+                headers={"Retry-After": str(login_limiter.retry_after(key))},
+            )
+    
     user = user_service.authenticate(email=form_data.username, password=form_data.password)
     if not user:
         raise HTTPException(
@@ -45,13 +69,30 @@ def login_access_token(
     return Token(access_token=access_token, token_type="bearer")
 
 
+def _user_etag(user: User) -> str:
+    """
+    Gerar ETag fraco a partir do conteúdo do usuário
+    """
+    digest = hashlib.sha1(user.model_dump_json().encode()).hexdigest()[:16]
+    return f'W/"{user.id}-{digest}"'
+
+
 @router.get("/me", response_model=User)
 def read_users_me(
+    request: Request,
+    response: Response,
     current_user: Annotated[User, Depends(get_current_active_user)]
 ) -> Any:
     """
     Obter usuário atual
+
+    Responde 304 quando o cliente envia um If-None-Match igual ao ETag atual.
     """
+    etag = _user_etag(current_user)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
     return current_user
 
 
@@ -68,7 +109,7 @@ def update_user_me(
     return user
 
 
-@router.get("/", response_model=List[User])
+@router.get("/", response_model=List[UserListItem])
 def read_users(
     current_user: Annotated[User, Depends(get_current_active_superuser)],
     skip: int = 0,
@@ -77,7 +118,7 @@ def read_users(
     """
     Recuperar usuários (apenas superusuários)
     """
-    users = user_service.get_multi(skip=skip, limit=limit)
+    users = user_service.get_multi_summary(skip=skip, limit=limit)
     return users
 
 
@@ -101,15 +142,53 @@ def create_user(
     return user
 
 
+# Buscas em andamento por user_id, compartilhadas entre requisições concorrentes
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+async def _get_user_single_flight(user_id: str) -> Optional[User]:
+    """
+    Buscar usuário garantindo uma única consulta ao banco por user_id em andamento
+    """
+    inflight = _inflight.get(user_id)
+    if inflight is not None:
+        try:
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            # Só a busca compartilhada foi cancelada (o líder desistiu): buscar por conta própria
+            if not inflight.cancelled():
+                raise
+            return await run_in_threadpool(user_service.get, id=user_id)
+    
+    future = asyncio.get_running_loop().create_future()
+    _inflight[user_id] = future
+    try:
+        user = await run_in_threadpool(user_service.get, id=user_id)
+    except Exception as exc:
+        # Repassar o erro real a quem aguarda; marcar como lido evita o aviso
+        # de exceção nunca recuperada quando não há ninguém aguardando
+        future.set_exception(exc)
+        future.exception()
+        raise
+    except BaseException:
+        future.cancel()
+        raise
+    else:
+        future.set_result(user)
+    finally:
+        _inflight.pop(user_id, None)
+    return user
+
+
 @router.get("/{user_id}", response_model=User)
-def read_user_by_id(
-    user_id: str,
+async def read_user_by_id(
+    user_id: UserId,
     current_user: Annotated[User, Depends(get_current_active_superuser)]
 ) -> Any:
     """
     Obter um usuário específico pelo id (apenas superusuários)
     """
-    user = user_service.get(id=user_id)
+    user = await _get_user_single_flight(user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -121,7 +200,7 @@ def read_user_by_id(
 @router.put("/{user_id}", response_model=User)
 def update_user(
     *,
-    user_id: str,
+    user_id: UserId,
     user_in: UserUpdate,
     current_user: Annotated[User, Depends(get_current_active_superuser)]
 ) -> Any:
@@ -1,20 +1,27 @@
-import json
 import asyncio 
+import hashlib
+import io
+import logging
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Optional, Callable, Set, Tuple
 from dotenv import load_dotenv
-from pymongo import MongoClient
+import orjson
 from bson import ObjectId
+from bson.errors import InvalidId
 
 from google.adk.agents import LlmAgent
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.models import Gemini
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.sessions import BaseSessionService, DatabaseSessionService, InMemorySessionService, Session
 from google.genai import types
 from pydantic import BaseModel, Field
 
 from app.core.config import settings
+from app.core.database import get_mongo_client
 from app.core.logging_config import get_logger
-from app.utils.serializers import serialize_mongodb_doc
+from app.utils.cache import CacheBackend, TTLCache
+from app.utils.rate_limit import TokenBucketLimiter
 
 # Load environment variables
 load_dotenv()
@@ -26,7 +33,7 @@ logger = get_logger(__name__)
 if not settings.GOOGLE_API_KEY:
     logger.warning("⚠️ GOOGLE_API_KEY não configurada - o agente ADK pode não funcionar!")
 else:
-    logger.info(f"✅ Google API Key configurada: {settings.GOOGLE_API_KEY[:10]}...")
+    logger.info("✅ Google API Key configurada: %s...", settings.GOOGLE_API_KEY[:10])
 
 # --- 1. Define Constants ---
 APP_NAME = settings.APP_NAME
@@ -40,25 +47,56 @@ ANSWERS_DATA_COLLECTION = 'answers_data'
 CONVERSATIONS_COLLECTION = 'conversations'
 
 # MongoDB Client
-logger.info(f"Conectando ao MongoDB: {DATABASE_NAME}")
-logger.info(f"Connection String: {CONNECTION_STRING[:50]}..." if len(CONNECTION_STRING) > 50 else CONNECTION_STRING)
-mongo_client = MongoClient(CONNECTION_STRING)
+logger.info("Conectando ao MongoDB: %s", DATABASE_NAME)
+logger.info("Connection String: %s", f"{CONNECTION_STRING[:50]}..." if len(CONNECTION_STRING) > 50 else CONNECTION_STRING)
+mongo_client = get_mongo_client()
 db = mongo_client[DATABASE_NAME]
 
-# Test connection
-try:
-    mongo_client.admin.command('ping')
-    logger.info("✅ Conexão com MongoDB estabelecida com sucesso")
-except Exception as e:
-    logger.error(f"❌ Erro ao conectar com MongoDB: {e}")
-    raise
+async def init_agent_db() -> None:
+    """
+    Warm up the MongoDB connection pool and ensure the indexes used by the agent.
+    
+    Meant to run once from the application startup hook, so the first request
+    does not pay for connection establishment or a collection scan.
+    """
+    try:
+        await asyncio.to_thread(mongo_client.admin.command, 'ping')
+        logger.info("✅ Conexão com MongoDB estabelecida com sucesso")
+    except Exception as e:
+        logger.error("❌ Erro ao conectar com MongoDB: %s", e)
+        raise
+    
+    try:
+        await asyncio.to_thread(db[ANSWERS_DATA_COLLECTION].create_index, "question_id")
+        logger.info("✅ Índice garantido: %s.question_id", ANSWERS_DATA_COLLECTION)
+    except Exception as e:
+        logger.warning("⚠️ Não foi possível criar índice em %s.question_id: %s", ANSWERS_DATA_COLLECTION, e)
+    
+    try:
+        await asyncio.to_thread(db[CONVERSATIONS_COLLECTION].create_index, "session_id", unique=True)
+        logger.info("✅ Índice garantido: %s.session_id", CONVERSATIONS_COLLECTION)
+    except Exception as e:
+        logger.warning("⚠️ Não foi possível criar índice em %s.session_id: %s", CONVERSATIONS_COLLECTION, e)
+
+async def init_agent_llm() -> None:
+    """
+    Build the shared genai client at startup instead of on the first question.
+    
+    Failures (e.g. a missing GOOGLE_API_KEY) are only logged: the API can still
+    serve the endpoints that do not use the agent.
+    """
+    try:
+        await asyncio.to_thread(lambda: gemini_model.api_client)
+        logger.info("✅ Cliente Gemini inicializado: %s", MODEL_NAME)
+    except Exception as e:
+        logger.warning("⚠️ Não foi possível inicializar o cliente Gemini: %s", e)
 
 # Input schema for ENEM question
 class QuestionInput(BaseModel):
     question_id: str = Field(description="The ID of the ENEM question to analyze.")
     context: str = Field(description="The context/text of the question.")
     alternatives: List[Dict[str, Any]] = Field(description="The question alternatives.")
-    sources: List[str] = Field(description="Relevant sources from answers_data collection.")
+    sources: str = Field(description="Relevant sources from answers_data collection, numbered in a single block.")
 
 # Output schema for ENEM answer
 class EnemAnswerOutput(BaseModel):
@@ -67,122 +105,360 @@ class EnemAnswerOutput(BaseModel):
     explanation: str = Field(description="Explanation of why this alternative is correct.")
     sources_used: List[str] = Field(description="List of sources that were most relevant for answering.")
 
+# Only the first MAX_SOURCES_PER_DOCUMENT search_results are used, and only
+# these fields of each one reach the prompt
+MAX_SOURCES_PER_DOCUMENT = 3
+SOURCE_FIELDS = ("title", "url", "content")
+
+MAX_DOCUMENTS_PER_QUESTION = 10
+
+# Fields of a question used by the agents and the conversation endpoints; none of
+# them holds an ObjectId, so the projected document needs no serialization
+QUESTION_DETAIL_FIELDS = ("title", "discipline", "year", "context", "alternativesIntroduction", "alternatives")
+
+# Only the most recent messages of a conversation are replayed into the prompt
+MAX_HISTORY_MESSAGES = 20
+
+def _sources_projection() -> Dict[str, Any]:
+    """$project stage that slices and projects search_results on the server."""
+    return {"$project": {
+        "_id": 0,
+        "question_id": 1,
+        "search_results": {
+            "$map": {
+                "input": {"$slice": [{"$ifNull": ["$search_results", []]}, MAX_SOURCES_PER_DOCUMENT]},
+                "as": "result",
+                "in": {field: f"$$result.{field}" for field in SOURCE_FIELDS},
+            }
+        },
+    }}
+
+def _build_sources_pipeline(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Aggregation that slices and projects search_results on the server."""
+    return [{"$match": match}, _sources_projection()]
+
+def _to_search_id(question_id: str) -> Any:
+    """ObjectId when the id is a valid hex string, the raw string otherwise."""
+    try:
+        return ObjectId(question_id)
+    except (InvalidId, TypeError):
+        return question_id
+
+def _fetch_questions_batch(question_ids: List[str]) -> Dict[str, Any]:
+    """Fetch many questions with a single $in query, keyed by requested id."""
+    search_ids = {question_id: _to_search_id(question_id) for question_id in question_ids}
+    cursor = db[QUESTIONS_COLLECTION].find(
+        {"_id": {"$in": list(search_ids.values())}},
+        {field: 1 for field in QUESTION_DETAIL_FIELDS}
+    )
+    by_id = {str(doc["_id"]): doc for doc in cursor}
+    return {question_id: by_id.get(str(search_id)) for question_id, search_id in search_ids.items()}
+
+def _fetch_sources_batch(question_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Fetch answers_data for many questions with a single $in query, keyed by requested id."""
+    # answers_data might store question_id as string or ObjectId: match both forms
+    search_ids = {question_id: _to_search_id(question_id) for question_id in question_ids}
+    values = set(question_ids) | set(search_ids.values())
+    documents = db[ANSWERS_DATA_COLLECTION].aggregate(
+        _build_sources_pipeline({"question_id": {"$in": list(values)}})
+    )
+    
+    by_id: Dict[str, List[Dict[str, Any]]] = {}
+    for document in documents:
+        group = by_id.setdefault(str(document.get("question_id")), [])
+        if len(group) < MAX_DOCUMENTS_PER_QUESTION:
+            group.append(document)
+    return {question_id: by_id.get(str(search_id), []) for question_id, search_id in search_ids.items()}
+
+def _fetch_questions_with_sources_batch(question_ids: List[str]) -> Dict[str, Any]:
+    """
+    Fetch many questions together with their answers_data in one round-trip,
+    using $lookup; each question carries its documents under "sources".
+    """
+    search_ids = {question_id: _to_search_id(question_id) for question_id in question_ids}
+    cursor = db[QUESTIONS_COLLECTION].aggregate([
+        {"$match": {"_id": {"$in": list(search_ids.values())}}},
+        {"$project": {
+            **{field: 1 for field in QUESTION_DETAIL_FIELDS},
+            # answers_data might store question_id as string or ObjectId: match both
+            # forms through an equality lookup, which uses the question_id index
+            "_source_keys": ["$_id", {"$toString": "$_id"}],
+        }},
+        {"$lookup": {
+            "from": ANSWERS_DATA_COLLECTION,
+            "localField": "_source_keys",
+            "foreignField": "question_id",
+            "pipeline": [{"$limit": MAX_DOCUMENTS_PER_QUESTION}, _sources_projection()],
+            "as": "sources",
+        }},
+        {"$project": {"_source_keys": 0}},
+    ])
+    by_id = {str(doc["_id"]): doc for doc in cursor}
+    return {question_id: by_id.get(str(search_id)) for question_id, search_id in search_ids.items()}
+
+class _BatchLoader:
+    """
+    DataLoader-style micro-batcher.
+    
+    Lookups issued within `delay` seconds of each other are coalesced into a
+    single call to `batch_fn`, which runs in a worker thread and returns a
+    mapping from each requested key to its result.
+    """
+    
+    def __init__(self, batch_fn: Callable[[List[str]], Dict[str, Any]], delay: float = 0.002):
+        self._batch_fn = batch_fn
+        self._delay = delay
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._flush_scheduled = False
+        self._flush_tasks: Set[asyncio.Task] = set()
+    
+    async def load(self, key: str) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_later(self._delay, self._schedule_flush)
+        return await future
+    
+    def _schedule_flush(self) -> None:
+        task = asyncio.get_running_loop().create_task(self._flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+    
+    async def _flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        self._flush_scheduled = False
+        logger.debug("Executando lote com %d chaves", len(pending))
+        try:
+            results = await asyncio.to_thread(self._batch_fn, list(pending))
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for key, futures in pending.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(results.get(key))
+
+_questions_loader = _BatchLoader(_fetch_questions_batch)
+_sources_loader = _BatchLoader(_fetch_sources_batch)
+_questions_with_sources_loader = _BatchLoader(_fetch_questions_with_sources_batch)
+
+# ENEM questions and their sources are immutable, so repeated lookups are served
+# from memory. Any CacheBackend (e.g. a Redis-backed one) can be swapped in here.
+question_details_cache: CacheBackend = TTLCache(maxsize=4096, ttl=3600)
+question_sources_cache: CacheBackend = TTLCache(maxsize=4096, ttl=3600)
+# Numbered, pre-joined sources block sent to the agents, filled alongside question_sources_cache
+formatted_sources_cache: CacheBackend = TTLCache(maxsize=4096, ttl=3600)
+# Misses (unknown ids, questions without sources) are remembered briefly so a
+# burst of requests for them does not reach MongoDB each time
+NEGATIVE_CACHE_TTL = 60
+
+# Structured answers for the same question are reused instead of calling the LLM again
+STRUCTURED_RESPONSE_CACHE_VERSION = "v1"
+llm_response_cache: CacheBackend = TTLCache(maxsize=2048, ttl=86400)
+
+# Sample queries used to diagnose misses are full collection scans; only run them
+# in debug mode with DEBUG logging enabled, and at most once per minute
+_debug_probe_limiter = TokenBucketLimiter(capacity=1, period=60)
+
+def _should_run_debug_probe() -> bool:
+    return settings.DEBUG and logger.isEnabledFor(logging.DEBUG) and _debug_probe_limiter.allow()
+
+# Speaker labels used when replaying a conversation history into the prompt
+HISTORY_ROLE_LABELS = {
+    "system": "SISTEMA",
+    "user": "USUÁRIO",
+    "agent": "AGENTE",
+}
+
+def _structured_response_cache_key(question_id: str, alternatives: List[Dict[str, Any]]) -> str:
+    """Stable key over the question and its alternatives for the LLM response cache."""
+    payload = orjson.dumps(
+        {"q": question_id, "alts": alternatives, "schema": STRUCTURED_RESPONSE_CACHE_VERSION},
+        option=orjson.OPT_SORT_KEYS,
+        default=str,
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+def _join_sources(sources: List[str]) -> str:
+    """Join sources into one block with a header and numbered entries."""
+    block = io.StringIO()
+    block.write(f"=== FONTES RELEVANTES ({len(sources)} fontes encontradas) ===")
+    for idx, source in enumerate(sources, 1):
+        block.write(f"\n--- FONTE #{idx} ---\n{source}\n")
+    return block.getvalue()
+
+def format_sources(question_id: str, sources: List[str]) -> str:
+    """Formatted sources block for a question, reusing the cached one when available."""
+    formatted = formatted_sources_cache.get(question_id)
+    if formatted is None:
+        formatted = _join_sources(sources)
+    return formatted
+
+def _sources_from_documents(documents: List[Dict[str, Any]]) -> List[str]:
+    """Render the (already sliced) search_results of answers_data documents as source texts."""
+    sources = []
+    for document in documents:
+        # Debug: mostrar a estrutura completa do documento
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Documento encontrado: %s", list(document.keys()))
+        
+        # Acessar o array search_results (já limitado às 3 primeiras fontes)
+        search_results = document.get('search_results', [])
+        logger.debug("Número de search_results encontrados: %d", len(search_results))
+        
+        for result in search_results:
+            sources.append(
+                f"Título: {result.get('title', 'N/A')}\n"
+                f"URL: {result.get('url', 'N/A')}\n"
+                f"Conteúdo: {result.get('content', 'N/A')}\n"
+            )
+    return sources
+
+def _cache_sources(question_id: str, sources: List[str]) -> None:
+    question_sources_cache.set(question_id, sources)
+    formatted_sources_cache.set(question_id, _join_sources(sources))
+
 # --- 3. Define Tools for ENEM Agent ---
-def get_question_sources(question_id: str) -> List[str]:
+# PyMongo is synchronous, so every query below runs in a worker thread
+# (directly or through a _BatchLoader) to keep the event loop free. The same
+# goes for ADK session lookups, which hit a database with DatabaseSessionService.
+async def get_question_sources(question_id: str) -> List[str]:
     """Retrieves relevant sources from answers_data collection for a specific question."""
-    logger.info(f"Buscando fontes para question_id: {question_id}")
+    logger.info("Buscando fontes para question_id: %s", question_id)
+    
+    cached = question_sources_cache.get(question_id)
+    if cached is not None:
+        logger.debug("Fontes em cache para question_id: %s (%s)", question_id, question_sources_cache.cache_info())
+        return cached
     
     try:
-        # Try both string and ObjectId formats for question_id field
-        # answers_data collection might store question_id as string or ObjectId
-        search_queries = [
-            {"question_id": question_id},  # Try as string first
-        ]
+        # Concurrent lookups are coalesced into a single $in query
+        documents = await _sources_loader.load(question_id)
+        sources = _sources_from_documents(documents)
         
-        # If it's a valid ObjectId, also try as ObjectId
-        if ObjectId.is_valid(question_id):
-            search_queries.append({"question_id": ObjectId(question_id)})
-        
-        sources = []
-        for query in search_queries:
-            logger.debug(f"Tentando query: {query}")
-            # Buscar o documento completo que contém os search_results
-            sources_cursor = db[ANSWERS_DATA_COLLECTION].find(
-                query,
-                {"search_results": 1, "_id": 0}
-            ).limit(10)
-            
-            for document in sources_cursor:
-                # Debug: mostrar a estrutura completa do documento
-                logger.debug(f"Documento encontrado: {list(document.keys())}")
-                
-                # Acessar o array search_results
-                search_results = document.get('search_results', [])
-                logger.debug(f"Número de search_results encontrados: {len(search_results)}, usando as 3 primeiras")
-                
-                # Processar apenas as 3 primeiras fontes
-                for result in search_results[:3]:  # Limitar a 3 fontes
-                    source_text = f"Título: {result.get('title', 'N/A')}\n"
-                    source_text += f"URL: {result.get('url', 'N/A')}\n"
-                    source_text += f"Conteúdo: {result.get('content', 'N/A')}\n"
-                    sources.append(source_text)
-            
-            # If we found sources, no need to try other queries
-            if sources:
-                break
-        
-        logger.info(f"Encontradas {len(sources)} fontes para question_id: {question_id}")
+        logger.info("Encontradas %d fontes para question_id: %s", len(sources), question_id)
         
         # Log das fontes encontradas para debug
-        if sources:
-            logger.info(f"Fontes encontradas: {sources[:2]}")  # Mostrar apenas as 2 primeiras para não poluir o log
+        if sources and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fontes encontradas: %s", sources[:2])  # Mostrar apenas as 2 primeiras para não poluir o log
         
         # If no sources found, let's debug a bit
         if not sources:
-            logger.warning(f"Nenhuma fonte encontrada para question_id: {question_id}")
+            logger.warning("Nenhuma fonte encontrada para question_id: %s", question_id)
             
             # Check some sample documents to understand the structure
-            sample_docs = list(db[ANSWERS_DATA_COLLECTION].find({}, {"question_id": 1, "_id": 1}).limit(3))
-            if sample_docs:
-                logger.info("Exemplos de question_id encontrados na answers_data:")
-                for doc in sample_docs:
-                    logger.info(f"  _id: {doc.get('_id')}, question_id: {doc.get('question_id')} (type: {type(doc.get('question_id'))})")
-            else:
-                logger.warning("Nenhum documento encontrado na collection answers_data!")
+            if _should_run_debug_probe():
+                sample_docs = await asyncio.to_thread(
+                    lambda: list(db[ANSWERS_DATA_COLLECTION].find({}, {"question_id": 1, "_id": 1}).limit(3))
+                )
+                if sample_docs:
+                    logger.debug("Exemplos de question_id encontrados na answers_data:")
+                    for doc in sample_docs:
+                        logger.debug("  _id: %s, question_id: %s (type: %s)", doc.get('_id'), doc.get('question_id'), type(doc.get('question_id')))
+                else:
+                    logger.warning("Nenhum documento encontrado na collection answers_data!")
+            question_sources_cache.set(question_id, sources, ttl=NEGATIVE_CACHE_TTL)
+        else:
+            _cache_sources(question_id, sources)
         
         return sources
         
     except Exception as e:
-        logger.error(f"Erro ao buscar fontes para question_id {question_id}: {str(e)}")
+        logger.error("Erro ao buscar fontes para question_id %s: %s", question_id, e)
         return [f"Erro ao buscar fontes: {str(e)}"]
 
-def get_question_details(question_id: str) -> Dict[str, Any]:
+def _question_details_from_document(question: Dict[str, Any]) -> Dict[str, Any]:
+    # Only QUESTION_DETAIL_FIELDS were projected, so dropping _id leaves a JSON-safe dict
+    return {key: question[key] for key in QUESTION_DETAIL_FIELDS if key in question}
+
+async def get_question_details(question_id: str) -> Dict[str, Any]:
     """Retrieves question details from the questions collection."""
-    logger.info(f"Buscando detalhes da questão: {question_id}")
+    logger.info("Buscando detalhes da questão: %s", question_id)
+    
+    cached = question_details_cache.get(question_id)
+    if cached is not None:
+        logger.debug("Questão em cache: %s (%s)", question_id, question_details_cache.cache_info())
+        return cached
     
     try:
-        # Convert string to ObjectId if needed
-        if ObjectId.is_valid(question_id):
-            search_id = ObjectId(question_id)
-            logger.debug(f"Convertendo para ObjectId: {question_id} -> {search_id}")
-        else:
-            search_id = question_id
-            logger.debug(f"Usando string diretamente: {question_id}")
-        
-        question = db[QUESTIONS_COLLECTION].find_one({"_id": search_id})
+        # Concurrent lookups are coalesced into a single $in query
+        question = await _questions_loader.load(question_id)
         
         if question:
-            # Use the serializer to handle ObjectIds properly
-            result = serialize_mongodb_doc(question)
-            logger.info(f"Questão encontrada: {result.get('title', 'N/A')}")
+            result = _question_details_from_document(question)
+            logger.info("Questão encontrada: %s", result.get('title', 'N/A'))
+            question_details_cache.set(question_id, result)
             return result
         else:
             # Try to find some sample questions to help debug
-            logger.warning(f"Questão não encontrada: {question_id}")
-            logger.info("Tentando listar algumas questões disponíveis...")
+            logger.warning("Questão não encontrada: %s", question_id)
             
-            sample_questions = list(db[QUESTIONS_COLLECTION].find({}, {"_id": 1, "title": 1}).limit(3))
-            if sample_questions:
-                logger.info("Exemplos de questões encontradas:")
-                for q in sample_questions:
-                    logger.info(f"  ID: {q['_id']} - {q.get('title', 'N/A')}")
-            else:
-                logger.warning("Nenhuma questão encontrada na coleção!")
+            if _should_run_debug_probe():
+                logger.debug("Tentando listar algumas questões disponíveis...")
+                sample_questions = await asyncio.to_thread(
+                    lambda: list(db[QUESTIONS_COLLECTION].find({}, {"_id": 1, "title": 1}).limit(3))
+                )
+                if sample_questions:
+                    logger.debug("Exemplos de questões encontradas:")
+                    for q in sample_questions:
+                        logger.debug("  ID: %s - %s", q['_id'], q.get('title', 'N/A'))
+                else:
+                    logger.warning("Nenhuma questão encontrada na coleção!")
             
+            question_details_cache.set(question_id, {}, ttl=NEGATIVE_CACHE_TTL)
             return {}
             
     except Exception as e:
-        logger.error(f"Erro ao buscar questão {question_id}: {str(e)}")
+        logger.error("Erro ao buscar questão %s: %s", question_id, e)
         return {"error": str(e)}
 
+async def get_question_with_sources(question_id: str) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Question details and sources together. When neither is cached both come from
+    a single $lookup aggregation instead of two separate queries.
+    """
+    if question_details_cache.get(question_id) is not None or question_sources_cache.get(question_id) is not None:
+        return await asyncio.gather(
+            get_question_details(question_id),
+            get_question_sources(question_id)
+        )
+    
+    try:
+        question = await _questions_with_sources_loader.load(question_id)
+    except Exception as e:
+        logger.error("Erro ao buscar questão e fontes %s: %s", question_id, e)
+        return {"error": str(e)}, []
+    
+    if not question:
+        # Falls back to the per-collection lookups, which log and probe misses
+        return await asyncio.gather(
+            get_question_details(question_id),
+            get_question_sources(question_id)
+        )
+    
+    question_details = _question_details_from_document(question)
+    question_details_cache.set(question_id, question_details)
+    
+    sources = _sources_from_documents(question.get("sources", []))
+    logger.info("Encontradas %d fontes para question_id: %s", len(sources), question_id)
+    if sources:
+        _cache_sources(question_id, sources)
+    else:
+        logger.warning("Nenhuma fonte encontrada para question_id: %s", question_id)
+        question_sources_cache.set(question_id, sources, ttl=NEGATIVE_CACHE_TTL)
+    
+    return question_details, sources
+
 # --- 4. Configure ENEM Agent ---
 
-# ENEM Question Agent: Uses tools to get sources and question details
-enem_agent = LlmAgent(
-    model=MODEL_NAME,
-    name="enem_question_agent",
-    description="Agente especializado em responder questões do ENEM usando fontes relevantes.",
-    instruction="""Você é um agente especializado em resolver questões do ENEM (Exame Nacional do Ensino Médio) do Brasil.
+# Agent instructions are static, so they are built once at import time.
+# The JSON schema is enforced through output_schema, so it is not repeated in the prompt.
+ENEM_AGENT_INSTRUCTION = """Você é um agente especializado em resolver questões do ENEM (Exame Nacional do Ensino Médio) do Brasil.
 
 IMPORTANTE: As fontes relevantes já estão incluídas no input fornecido no campo 'sources'.
 Você DEVE basear sua resposta principalmente nessas fontes fornecidas.
@@ -215,24 +491,14 @@ Fontes utilizadas:
 
 Sempre baseie suas respostas nas fontes fornecidas e no conhecimento acadêmico apropriado para o nível do ensino médio brasileiro.
 Se as fontes fornecidas não contiverem informação suficiente, indique isso claramente.
-""",
-    tools=[get_question_details],
-    input_schema=QuestionInput,
-    output_key="enem_response", # Store final response
-)
+"""
 
-# ENEM Agent with structured output (for API responses)
-enem_structured_agent = LlmAgent(
-    model=MODEL_NAME,
-    name="enem_structured_agent",
-    description="Agente ENEM que retorna respostas em formato JSON estruturado.",
-    instruction=f"""Você é um agente especializado em resolver questões do ENEM.
+ENEM_STRUCTURED_AGENT_INSTRUCTION = """Você é um agente especializado em resolver questões do ENEM.
 
 IMPORTANTE: As fontes relevantes já estão incluídas no input fornecido no campo 'sources'.
 Você DEVE basear sua resposta principalmente nessas fontes fornecidas.
 
-Analise a questão fornecida e responda APENAS com um JSON estruturado conforme o schema:
-{json.dumps(EnemAnswerOutput.model_json_schema(), indent=2)}
+Analise a questão fornecida e responda APENAS com um JSON estruturado conforme o output_schema.
 
 Baseie suas respostas nas fontes fornecidas no campo 'sources' e forneça:
 1. reasoning: Raciocínio detalhado explicando como resolver a questão, citando as fontes específicas
@@ -245,7 +511,30 @@ Exemplo: ["Título: Questão 146, caderno azul do ENEM 2023 - DIA 2 - URL: https
 
 Use sempre linguagem clara e apropriada para estudantes do ensino médio brasileiro.
 Se as fontes fornecidas não contiverem informação suficiente, indique isso claramente no reasoning.
-""",
+"""
+
+# One model instance shared by both agents. Given a model name, ADK builds a new
+# Gemini wrapper, and with it a new genai client, on every LLM call; sharing the
+# instance keeps a single client and its open connections.
+gemini_model = Gemini(model=MODEL_NAME)
+
+# ENEM Question Agent: Uses tools to get sources and question details
+enem_agent = LlmAgent(
+    model=gemini_model,
+    name="enem_question_agent",
+    description="Agente especializado em responder questões do ENEM usando fontes relevantes.",
+    instruction=ENEM_AGENT_INSTRUCTION,
+    tools=[get_question_details],
+    input_schema=QuestionInput,
+    output_key="enem_response", # Store final response
+)
+
+# ENEM Agent with structured output (for API responses)
+enem_structured_agent = LlmAgent(
+    model=gemini_model,
+    name="enem_structured_agent",
+    description="Agente ENEM que retorna respostas em formato JSON estruturado.",
+    instruction=ENEM_STRUCTURED_AGENT_INSTRUCTION,
     input_schema=QuestionInput,
     output_schema=EnemAnswerOutput, # Enforce JSON output structure
     output_key="enem_structured_response", # Store final JSON response
@@ -254,7 +543,22 @@ Se as fontes fornecidas não contiverem informação suficiente, indique isso cl
 )
 
 # --- 5. Set up Session Management and Runners ---
-session_service = InMemorySessionService()
+def _build_session_service() -> BaseSessionService:
+    """
+    Use a database-backed session store when ADK_SESSION_DB_URL is set, so
+    sessions are shared across workers and survive restarts; otherwise keep
+    sessions in process memory.
+    """
+    if settings.ADK_SESSION_DB_URL:
+        logger.info("🗄️ Usando DatabaseSessionService para sessões ADK")
+        return DatabaseSessionService(db_url=settings.ADK_SESSION_DB_URL)
+    logger.info("🧠 Usando InMemorySessionService para sessões ADK")
+    return InMemorySessionService()
+
+session_service = _build_session_service()
+
+# Server-sent-event streaming: the runner yields partial events as text arrives
+STREAMING_RUN_CONFIG = RunConfig(streaming_mode=StreamingMode.SSE)
 
 # Create runners for ENEM agents
 enem_runner = Runner(
@@ -289,47 +593,46 @@ async def process_enem_question(
         Dict containing the agent's response and metadata
     """
     
-    logger.info(f"🤖 Processando questão ENEM - Question: {question_id}, User: {user_id}, Session: {session_id}")
+    logger.info("🤖 Processando questão ENEM - Question: %s, User: %s, Session: %s", question_id, user_id, session_id)
     
-    # Ensure ADK session exists before proceeding
-    try:
-        session_created = get_or_create_session(user_id, session_id)
-        if session_created:
-            logger.info(f"🆕 Nova sessão ADK criada: {session_id}")
-        else:
-            logger.info(f"🔄 Usando sessão ADK existente: {session_id}")
-    except Exception as e:
-        logger.error(f"❌ Falha ao criar/obter sessão ADK: {e}")
-        return {"error": f"Failed to create/get ADK session: {str(e)}"}
+    # Ensure the ADK session exists while question details and sources are fetched:
+    # the two are independent, so neither waits for the other
+    logger.info("📚 Buscando detalhes e fontes para question_id: %s", question_id)
+    session_result, question_result = await asyncio.gather(
+        asyncio.to_thread(get_or_create_session, user_id, session_id),
+        get_question_with_sources(question_id),
+        return_exceptions=True
+    )
+    
+    if isinstance(session_result, Exception):
+        logger.error("❌ Falha ao criar/obter sessão ADK: %s", session_result)
+        return {"error": f"Failed to create/get ADK session: {str(session_result)}"}
+    if session_result:
+        logger.info("🆕 Nova sessão ADK criada: %s", session_id)
+    else:
+        logger.info("🔄 Usando sessão ADK existente: %s", session_id)
     
-    # Get question details from database
-    question_details = get_question_details(question_id)
+    if isinstance(question_result, Exception):
+        raise question_result
+    question_details, sources = question_result
     if not question_details or "error" in question_details:
         return {"error": f"Question {question_id} not found or error retrieving it"}
     
-    # Get relevant sources
-    logger.info(f"📚 Buscando fontes para question_id: {question_id}")
-    sources = get_question_sources(question_id)
-    logger.info(f"📚 Fontes retornadas: {len(sources)} fontes (tipo: {type(sources)})")
+    logger.info("📚 Fontes retornadas: %d fontes (tipo: %s)", len(sources), type(sources))
     
     if sources:
-        logger.info(f"📚 Primeiras 100 chars da primeira fonte: {str(sources[0])[:100] if sources else 'N/A'}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📚 Primeiras 100 chars da primeira fonte: %s", str(sources[0])[:100])
     else:
-        logger.warning(f"⚠️ NENHUMA FONTE ENCONTRADA para question_id: {question_id}")
+        logger.warning("⚠️ NENHUMA FONTE ENCONTRADA para question_id: %s", question_id)
     
     # Format sources with clear numbering and structure for better LLM comprehension
-    formatted_sources = []
-    if sources and len(sources) > 0:
-        formatted_sources.append(f"=== FONTES RELEVANTES ({len(sources)} fontes encontradas) ===\n")
-        for idx, source in enumerate(sources, 1):
-            formatted_sources.append(f"--- FONTE #{idx} ---")
-            formatted_sources.append(source)
-            formatted_sources.append("")  # Empty line for separation
-        logger.info(f"✅ Fontes formatadas com sucesso: {len(sources)} fontes")
+    if sources:
+        formatted_sources = format_sources(question_id, sources)
+        logger.info("✅ Fontes formatadas com sucesso: %d fontes", len(sources))
     else:
         logger.warning("⚠️ Formatando resposta sem fontes")
-        formatted_sources.append("=== NENHUMA FONTE ENCONTRADA ===")
-        formatted_sources.append("Responda baseado no seu conhecimento acadêmico.")
+        formatted_sources = "=== NENHUMA FONTE ENCONTRADA ===\nResponda baseado no seu conhecimento acadêmico."
     
     # Prepare input for agent
     question_input = {
@@ -339,50 +642,68 @@ async def process_enem_question(
         "sources": formatted_sources
     }
     
-    # Choose the appropriate runner and agent
-    if use_structured_output:
-        runner_instance = enem_structured_runner
-        agent_instance = enem_structured_agent
-    else:
-        runner_instance = enem_runner
-        agent_instance = enem_agent
+    # Choose the appropriate runner
+    runner_instance = enem_structured_runner if use_structured_output else enem_runner
     
     # Send query to agent
-    logger.info(f"📤 Enviando questão para agente ADK...")
+    logger.info("📤 Enviando questão para agente ADK...")
     user_content = types.Content(
         role='user', 
-        parts=[types.Part(text=json.dumps(question_input))]
+        parts=[types.Part(text=orjson.dumps(question_input, default=str).decode())]
     )
     
     final_response_content = "No response received."
     
-
+    # Structured answers are cached by question + alternatives: on a hit skip the LLM
+    cache_key = None
+    if use_structured_output:
+        cache_key = _structured_response_cache_key(question_id, question_details["alternatives"])
+        cached_response = llm_response_cache.get(cache_key)
+        if cached_response is not None:
+            try:
+                cached_output = EnemAnswerOutput.model_validate_json(cached_response)
+                logger.info("♻️ Resposta estruturada obtida do cache para question_id: %s", question_id)
+                return {
+                    "question_id": question_id,
+                    "question_details": question_details,
+                    "response": cached_response,
+                    "stored_output": cached_output.model_dump(),
+                    "session_id": session_id,
+                    "sources_count": len(sources),
+                    "sources": sources
+                }
+            except ValueError as e:
+                logger.warning("⚠️ Resposta em cache inválida, consultando o agente: %s", e)
+
+    response_received = False
     try:
-        logger.debug(f"🔧 Running with app_name={APP_NAME}, user_id={user_id}, session_id={session_id}")
+        logger.debug("🔧 Running with app_name=%s, user_id=%s, session_id=%s", APP_NAME, user_id, session_id)
         async for event in runner_instance.run_async(
             user_id=user_id, 
             session_id=session_id, 
             new_message=user_content
         ):
-            logger.debug(f"📥 Event received from ADK")
+            logger.debug("📥 Event received from ADK")
             if event.is_final_response() and event.content and event.content.parts:
                 final_response_content = event.content.parts[0].text
-                logger.info(f"✅ Resposta recebida do agente ADK (tamanho: {len(final_response_content)} chars)")
+                response_received = True
+                logger.info("✅ Resposta recebida do agente ADK (tamanho: %d chars)", len(final_response_content))
     except Exception as e:
-        logger.error(f"❌ Erro durante execução do agente ADK: {e}")
+        logger.error("❌ Erro durante execução do agente ADK: %s", e)
         logger.warning("🔄 Usando resposta de fallback devido ao erro do ADK")
     
-    # Get session state
-    try:
-        current_session = session_service.get_session(
-            app_name=APP_NAME,
-            user_id=user_id,
-            session_id=session_id
-        )
-        stored_output = current_session.state.get(agent_instance.output_key) if current_session.state else None
-    except Exception as e:
-        logger.warning(f"⚠️ Erro ao obter estado da sessão: {e}")
-        stored_output = None
+    # Parse the final answer once; the session state would only hold the same value again
+    stored_output = None
+    if response_received:
+        if use_structured_output:
+            try:
+                parsed_output = EnemAnswerOutput.model_validate_json(final_response_content)
+                stored_output = parsed_output.model_dump()
+                llm_response_cache.set(cache_key, final_response_content)
+            except ValueError as e:
+                logger.warning("⚠️ Resposta estruturada inválida, não armazenada em cache: %s", e)
+        else:
+            stored_output = final_response_content
     
     return {
         "question_id": question_id,
@@ -394,6 +715,125 @@ async def process_enem_question(
         "sources": sources  # Include original sources for storage in conversation metadata
     }
 
+async def _build_conversation_context(session_id: str, question_id: Optional[str], message: str) -> str:
+    """
+    Build the full prompt (history + sources + new message) for an ADK session
+    that has no previous turns, e.g. a recreated session or one whose first
+    answer was served from the structured response cache.
+    """
+    # Get the most recent conversation history
+    conversation = await asyncio.to_thread(
+        db[CONVERSATIONS_COLLECTION].find_one,
+        {"session_id": session_id},
+        {"_id": 0, "messages": {"$slice": -MAX_HISTORY_MESSAGES}}
+    )
+    conversation_history = conversation.get("messages", []) if conversation else []
+    logger.info("📜 Histórico recuperado: %d mensagens", len(conversation_history))
+    
+    # Get sources for this question
+    sources: List[str] = []
+    if question_id:
+        logger.info("📚 Recuperando fontes para question_id: %s", question_id)
+        sources = await get_question_sources(question_id)
+        logger.info("📚 Fontes recuperadas: %d fontes (tipo: %s)", len(sources), type(sources))
+        if not sources:
+            logger.warning("⚠️ Nenhuma fonte encontrada para question_id: %s", question_id)
+    else:
+        logger.warning("⚠️ Conversa encontrada mas sem question_id associado")
+    
+    # Build complete context in a single buffer: History + Sources + New Message
+    context = io.StringIO()
+    
+    if conversation_history:
+        context.write("=== HISTÓRICO DA CONVERSA ===")
+        for msg in conversation_history:
+            role = msg.get("role", "unknown")
+            label = HISTORY_ROLE_LABELS.get(role, role.upper())
+            context.write(f"\n[{label}]: {msg.get('content', '')}")
+        context.write("\n\n")
+        logger.info("📜 Contexto do histórico criado (%d linhas)", len(conversation_history) + 1)
+    
+    if sources:
+        context.write(format_sources(question_id, sources))
+        context.write("\n\n")
+        logger.info("✅ Contexto de fontes adicionado (%d fontes)", len(sources))
+    
+    context.write("=== NOVA MENSAGEM DO USUÁRIO ===\n\n")
+    context.write(message)
+    
+    return context.getvalue()
+
+async def _prepare_conversation_turn(user_id: str, session_id: str, message: str) -> Tuple[str, Optional[str]]:
+    """
+    Ensure the conversation's ADK session and build the text to send for a new message.
+    
+    Returns:
+        (context, error): error is set when the conversation or the session is unavailable
+    """
+    # Get the conversation from MongoDB; its messages are only loaded when needed
+    conversation = await asyncio.to_thread(
+        db[CONVERSATIONS_COLLECTION].find_one,
+        {"session_id": session_id},
+        {"question_id": 1}
+    )
+    logger.info("🔍 Conversa encontrada: %s", conversation is not None)
+    
+    if not conversation:
+        logger.error("❌ Conversa não encontrada para session_id: %s", session_id)
+        return "", f"Conversation not found for session_id: {session_id}"
+    
+    # Reuse the conversation's own ADK session instead of a throwaway one per message
+    try:
+        adk_session = await asyncio.to_thread(_load_session, user_id, session_id)
+    except Exception as e:
+        logger.error("❌ Falha ao criar/obter sessão ADK: %s", e)
+        return "", f"Failed to create/get ADK session: {str(e)}"
+    
+    # When the session already holds previous turns the agent sees them through
+    # ADK, so history and sources are only rebuilt for an empty (new/lost) session
+    session_has_history = bool(adk_session and adk_session.events)
+    logger.info("🔄 Sessão ADK %s com histórico: %s", session_id, session_has_history)
+    
+    if session_has_history:
+        # Only the new message goes to the agent; ADK replays the earlier turns
+        return message, None
+    return await _build_conversation_context(session_id, conversation.get("question_id"), message), None
+
+async def stream_message_to_conversation(
+    user_id: str,
+    session_id: str,
+    message: str
+) -> AsyncIterator[str]:
+    """
+    Same as add_message_to_conversation (free-text agent only), but yields the
+    answer in chunks as the model produces them instead of returning it at the end.
+    
+    Raises:
+        LookupError: If the conversation or its ADK session is unavailable
+    """
+    logger.info("💬 Adicionando mensagem (streaming) à conversa - Session: %s", session_id)
+    
+    complete_context, error = await _prepare_conversation_turn(user_id, session_id, message)
+    if error:
+        raise LookupError(error)
+    
+    user_content = types.Content(role='user', parts=[types.Part(text=complete_context)])
+    streamed = False
+    async for event in enem_runner.run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=user_content,
+        run_config=STREAMING_RUN_CONFIG
+    ):
+        if not (event.content and event.content.parts and event.content.parts[0].text):
+            continue
+        if event.partial:
+            streamed = True
+            yield event.content.parts[0].text
+        elif event.is_final_response() and not streamed:
+            # The model answered in one piece: the final event carries the whole text
+            yield event.content.parts[0].text
+
 async def add_message_to_conversation(
     user_id: str,
     session_id: str,
@@ -413,129 +853,37 @@ async def add_message_to_conversation(
         Dict containing the agent's response
     """
     
-    logger.info(f"💬 Adicionando mensagem à conversa - Session: {session_id}")
+    logger.info("💬 Adicionando mensagem à conversa - Session: %s", session_id)
     
-    # Get conversation and its full history from MongoDB
-    conversation = db[CONVERSATIONS_COLLECTION].find_one({"session_id": session_id})
-    logger.info(f"🔍 Conversa encontrada: {conversation is not None}")
+    complete_context, error = await _prepare_conversation_turn(user_id, session_id, message)
+    if error:
+        return {"error": error}
     
-    if not conversation:
-        logger.error(f"❌ Conversa não encontrada para session_id: {session_id}")
-        return {"error": f"Conversation not found for session_id: {session_id}"}
-    
-    # Get conversation history
-    conversation_history = conversation.get("messages", [])
-    logger.info(f"📜 Histórico recuperado: {len(conversation_history)} mensagens")
-    
-    # Get sources for this question
-    sources_context = ""
-    question_id = conversation.get("question_id")
-    if question_id:
-        logger.info(f"📚 Recuperando fontes para question_id: {question_id}")
-        sources = get_question_sources(question_id)
-        logger.info(f"📚 Fontes recuperadas: {len(sources)} fontes (tipo: {type(sources)})")
-        
-        # Format sources with clear numbering and structure
-        formatted_sources = []
-        if sources and len(sources) > 0:
-            formatted_sources.append(f"=== FONTES RELEVANTES ({len(sources)} fontes encontradas) ===")
-            for idx, source in enumerate(sources, 1):
-                formatted_sources.append(f"--- FONTE #{idx} ---")
-                formatted_sources.append(source)
-                formatted_sources.append("")  # Empty line for separation
-            sources_context = "\n".join(formatted_sources)
-            logger.info(f"✅ Contexto de fontes adicionado ({len(sources)} fontes)")
-        else:
-            logger.warning(f"⚠️ Nenhuma fonte encontrada para question_id: {question_id}")
-    else:
-        logger.warning(f"⚠️ Conversa encontrada mas sem question_id associado")
-    
-    # Build conversation history context
-    history_context = ""
-    if conversation_history:
-        history_lines = ["=== HISTÓRICO DA CONVERSA ==="]
-        for msg in conversation_history:
-            role = msg.get("role", "unknown")
-            content = msg.get("content", "")
-            
-            if role == "system":
-                history_lines.append(f"[SISTEMA]: {content}")
-            elif role == "user":
-                history_lines.append(f"[USUÁRIO]: {content}")
-            elif role == "agent":
-                history_lines.append(f"[AGENTE]: {content}")
-            else:
-                history_lines.append(f"[{role.upper()}]: {content}")
-        
-        history_context = "\n".join(history_lines)
-        logger.info(f"📜 Contexto do histórico criado ({len(history_lines)} linhas)")
-    
-    # Choose the appropriate runner and agent
-    if use_structured_output:
-        runner_instance = enem_structured_runner
-        agent_instance = enem_structured_agent
-    else:
-        runner_instance = enem_runner
-        agent_instance = enem_agent
-    
-    # Build complete context: History + Sources + New Message
-    context_parts = []
-    
-    if history_context:
-        context_parts.append(history_context)
-    
-    if sources_context:
-        context_parts.append(sources_context)
-    
-    context_parts.append("=== NOVA MENSAGEM DO USUÁRIO ===")
-    context_parts.append(message)
-    
-    complete_context = "\n\n".join(context_parts)
-    
-    # Create a new ADK session for this stateless interaction
-    temp_session_id = f"temp_{session_id}_{len(conversation_history)}"
-    logger.info(f"🔄 Criando sessão temporária para interação: {temp_session_id}")
-    
-    try:
-        session_created = get_or_create_session(user_id, temp_session_id)
-        logger.info(f"✅ Sessão temporária criada: {session_created}")
-    except Exception as e:
-        logger.error(f"❌ Falha ao criar sessão temporária: {e}")
-        return {"error": f"Failed to create temporary session: {str(e)}"}
+    # Choose the appropriate runner
+    runner_instance = enem_structured_runner if use_structured_output else enem_runner
     
     # Send complete context to agent
     try:
-        logger.info(f"📤 Enviando contexto completo para agente (tamanho: {len(complete_context)} chars)")
+        logger.info("📤 Enviando contexto completo para agente (tamanho: %d chars)", len(complete_context))
         user_content = types.Content(
             role='user',
             parts=[types.Part(text=complete_context)]
         )
         
         final_response_content = "No response received."
-        logger.info(f"🔄 Iniciando comunicação com agente ADK...")
+        logger.info("🔄 Iniciando comunicação com agente ADK...")
         
         async for event in runner_instance.run_async(
             user_id=user_id,
-            session_id=temp_session_id,
+            session_id=session_id,
             new_message=user_content
         ):
-            logger.debug(f"📥 Event recebido do ADK: {type(event)}")
+            logger.debug("📥 Event recebido do ADK: %s", type(event))
             if event.is_final_response() and event.content and event.content.parts:
                 final_response_content = event.content.parts[0].text
-                logger.info(f"✅ Resposta recebida do agente ADK (tamanho: {len(final_response_content)} chars)")
-        
-        # Clean up temporary session
-        try:
-            session_service.delete_session(
-                app_name=APP_NAME,
-                user_id=user_id,
-                session_id=temp_session_id
-            )
-            logger.debug(f"🗑️ Sessão temporária removida: {temp_session_id}")
-        except:
-            pass  # Ignore cleanup errors
+                logger.info("✅ Resposta recebida do agente ADK (tamanho: %d chars)", len(final_response_content))
         
-        logger.info(f"🎯 Retornando resposta final")
+        logger.info("🎯 Retornando resposta final")
         return {
             "response": final_response_content,
             "session_id": session_id,
@@ -543,11 +891,16 @@ async def add_message_to_conversation(
         }
         
     except Exception as e:
-        logger.error(f"❌ Erro durante comunicação com agente ADK: {e}")
-        logger.error(f"❌ Tipo do erro: {type(e).__name__}")
-        logger.error(f"❌ Detalhes do erro: {str(e)}")
+        logger.error("❌ Erro durante comunicação com agente ADK: %s", e)
+        logger.error("❌ Tipo do erro: %s", type(e).__name__)
+        logger.error("❌ Detalhes do erro: %s", e)
         raise e
 
+def _load_session(user_id: str, session_id: str) -> Session:
+    """Ensure the ADK session exists and return it (blocking; run it in a worker thread)."""
+    session, _ = _get_or_create(user_id, session_id)
+    return session
+
 # Function to get or create session
 def get_or_create_session(user_id: str, session_id: str) -> bool:
     """
@@ -556,85 +909,63 @@ def get_or_create_session(user_id: str, session_id: str) -> bool:
     Returns:
         bool: True if session was created, False if it already existed
     """
-    logger.info(f"🔗 Verificando sessão ADK - User: {user_id}, Session: {session_id}")
+    _, created = _get_or_create(user_id, session_id)
+    return created
+
+
+def _get_or_create(user_id: str, session_id: str) -> Tuple[Session, bool]:
+    """
+    One read on the warm path, one read plus one create on the cold path.
     
-    try:
-        # Try to get existing session
-        existing_session = session_service.get_session(
-            app_name=APP_NAME,
-            user_id=user_id,
-            session_id=session_id
-        )
-        logger.info(f"✅ Sessão ADK já existe: {session_id}")
-        logger.debug(f"   Session details: {type(existing_session)}, state: {len(str(existing_session.state)) if existing_session.state else 0} chars")
-        
-        # Even if session exists, let's verify it's properly initialized
-        # by trying to access its state
-        try:
-            _ = existing_session.state
-            logger.debug(f"   Session state accessible")
-        except Exception as state_error:
-            logger.warning(f"⚠️ Session exists but state not accessible: {state_error}")
-            # Session might be corrupted, recreate it
-            return _force_create_session(user_id, session_id)
-        
-        return False  # Session already exists and is valid
-        
-    except Exception as e:
-        # Session doesn't exist, create it
-        logger.info(f"🆕 Criando nova sessão ADK: {session_id}")
-        logger.debug(f"   Reason for creation: {str(e)}")
-        return _force_create_session(user_id, session_id)
+    ADK's create_session replaces an existing session, so the read has to come
+    first; a missing session is reported as None, not as an exception.
+    """
+    logger.info("🔗 Verificando sessão ADK - User: %s, Session: %s", user_id, session_id)
+    
+    session = session_service.get_session(
+        app_name=APP_NAME,
+        user_id=user_id,
+        session_id=session_id
+    )
+    if session is not None:
+        logger.info("✅ Sessão ADK já existe: %s", session_id)
+        return session, False
+    
+    logger.info("🆕 Criando nova sessão ADK: %s", session_id)
+    return _create_session(user_id, session_id), True
 
 
-def _force_create_session(user_id: str, session_id: str) -> bool:
-    """Force create a new session, removing any existing one first."""
+def _create_session(user_id: str, session_id: str) -> Session:
+    """Create a new ADK session."""
     try:
         # Check Google API Key first
         if not settings.GOOGLE_API_KEY:
             error_msg = "Google API Key not configured. Set GOOGLE_API_KEY in environment variables."
-            logger.error(f"❌ {error_msg}")
+            logger.error("❌ %s", error_msg)
             raise ValueError(error_msg)
         
-        # Try to remove existing session if any
-        try:
-            session_service.delete_session(
-                app_name=APP_NAME,
-                user_id=user_id,
-                session_id=session_id
-            )
-            logger.debug(f"   Removed existing session: {session_id}")
-        except:
-            pass  # Session didn't exist
-        
-        # Create new session
-        logger.debug(f"   Creating session with app_name={APP_NAME}, user_id={user_id}, session_id={session_id}")
-        session_service.create_session(
-            app_name=APP_NAME,
-            user_id=user_id,
-            session_id=session_id
-        )
-        logger.info(f"✅ Sessão ADK criada com sucesso: {session_id}")
-        
-        # Verify the session was created properly
-        verify_session = session_service.get_session(
+        logger.debug("   Creating session with app_name=%s, user_id=%s, session_id=%s", APP_NAME, user_id, session_id)
+        session = session_service.create_session(
             app_name=APP_NAME,
             user_id=user_id,
             session_id=session_id
         )
-        logger.debug(f"   Verification: session type {type(verify_session)}")
+        logger.info("✅ Sessão ADK criada com sucesso: %s", session_id)
         
-        return True  # Session was created
+        return session
         
     except Exception as create_error:
-        logger.error(f"❌ Erro ao criar sessão ADK {session_id}: {create_error}")
-        logger.error(f"   Error details: {type(create_error).__name__}: {str(create_error)}")
+        logger.error("❌ Erro ao criar sessão ADK %s: %s", session_id, create_error)
+        logger.error("   Error details: %s: %s", type(create_error).__name__, create_error)
         raise create_error
 
 # --- 7. Export the main functions for use in API ---
 __all__ = [
+    'init_agent_db',
+    'init_agent_llm',
     'process_enem_question',
     'add_message_to_conversation', 
+    'stream_message_to_conversation',
     'get_or_create_session',
     'enem_agent',
     'enem_structured_agent',
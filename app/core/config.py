@@ -1,5 +1,5 @@
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Union
-import os
 
 from pydantic import AnyHttpUrl, validator, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -31,11 +31,16 @@ class Settings(BaseSettings):
     LOG_FILE_PATH: Optional[str] = None
     
     # MongoDB
-    MONGODB_CONNECTION_STRING: Optional[str] = os.getenv("MONGODB_CONNECTION_STRING", "mongodb://localhost:27017")
-    DATABASE_NAME: Optional[str] = os.getenv("DATABASE_NAME", "genem")
+    MONGODB_CONNECTION_STRING: Optional[str] = "mongodb://localhost:27017"
+    DATABASE_NAME: Optional[str] = "genem"
     DATABASE_USER: Optional[str] = None
     DATABASE_PASSWORD: Optional[str] = None
     DATABASE_HOST: Optional[str] = None
+    MONGODB_MIN_POOL_SIZE: int = 10
+    MONGODB_MAX_POOL_SIZE: int = 100
+    # Compressão do protocolo; "zstd,snappy,zlib" exige os pacotes zstandard/python-snappy
+    MONGODB_COMPRESSORS: str = "zlib"
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
     
     # Server
     SERVER_PORT: int = 8000
@@ -44,6 +49,10 @@ class Settings(BaseSettings):
     JWT_PRIVATE_KEY: Optional[str] = None
     JWT_SECRET_KEY: str = "jwt_stub"  # Em produção, deve vir da variável de ambiente
     
+    # Rate limit do login (tentativas por período, por IP e por email)
+    LOGIN_RATE_LIMIT: int = 5
+    LOGIN_RATE_LIMIT_PERIOD_SECONDS: int = 60
+    
     # Admin
     LOGIN: Optional[str] = None
     PASSWORD: Optional[str] = None
@@ -52,6 +61,10 @@ class Settings(BaseSettings):
     GROQ_API_KEY: Optional[str] = None
     GROQ_API_TOKENS: Optional[str] = None  # Lista de tokens separados por vírgula
     GROQ_MODEL_NAME: str = "meta-llama/llama-4-scout-17b-16e-instruct" 
+    # Gera a questão em uma única chamada (rascunho, crítica e versão final no mesmo prompt)
+    QUESTION_GENERATION_SINGLE_SHOT: bool = False
+    # Número máximo de gerações de questão executando ao mesmo tempo por processo
+    MAX_CONCURRENT_GENERATIONS: int = 8
     
     def get_groq_tokens(self) -> List[str]:
         """Retorna a lista de tokens GROQ disponíveis"""
@@ -77,16 +90,30 @@ class Settings(BaseSettings):
         return unique_tokens
     
     # Google ADK
-    GOOGLE_API_KEY: Optional[str] = os.getenv("GOOGLE_API_KEY", None)
-    GOOGLE_MODEL_NAME: Optional[str] = os.getenv("GOOGLE_MODEL_NAME", "gemini-2.0-flash")
+    GOOGLE_API_KEY: Optional[str] = None
+    GOOGLE_MODEL_NAME: Optional[str] = "gemini-2.0-flash"
     APP_NAME: str = "genem_enem_agent"
+    # URL SQLAlchemy para persistir sessões ADK (ex: postgresql://...); vazio usa memória
+    ADK_SESSION_DB_URL: Optional[str] = None
+    
+    # Embeddings
+    # Arquivo SQLite que persiste o cache de embeddings entre reinícios; vazio usa só memória
+    EMBEDDING_CACHE_PATH: Optional[str] = None
     
     model_config = SettingsConfigDict(
         env_file=".env", 
         env_file_encoding="utf-8", 
         case_sensitive=True,
         extra="ignore",
+        # Os defaults acima são literais já válidos; só valores vindos do ambiente são validados
+        validate_default=False,
     )
 
 
-settings = Settings() 
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Instância única de Settings; o .env e o ambiente são lidos só na primeira chamada."""
+    return Settings()
+
+
+settings = get_settings()
\ No newline at end of file
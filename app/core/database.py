@@ -0,0 +1,51 @@
+import threading
+from typing import Optional
+
+from pymongo import MongoClient
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_client: Optional[MongoClient] = None
+_client_lock = threading.Lock()
+
+
+def get_mongo_client() -> MongoClient:
+    """
+    Obter o MongoClient compartilhado pela aplicação.
+
+    O cliente é criado uma única vez por processo, de modo que todos os serviços
+    e o agente reutilizam o mesmo pool de conexões.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if not settings.MONGODB_CONNECTION_STRING:
+                    raise ValueError("MONGODB_CONNECTION_STRING não configurada")
+                logger.info(
+                    "🗄️ Criando pool MongoDB (min=%d, max=%d, compressores=%s)",
+                    settings.MONGODB_MIN_POOL_SIZE,
+                    settings.MONGODB_MAX_POOL_SIZE,
+                    settings.MONGODB_COMPRESSORS,
+                )
+                _client = MongoClient(
+                    settings.MONGODB_CONNECTION_STRING,
+                    minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+                    maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+                    compressors=settings.MONGODB_COMPRESSORS,
+                    retryReads=True,
+                    serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+                )
+    return _client
+
+
+def close_mongo_client() -> None:
+    """Fechar o pool compartilhado (usado no shutdown da aplicação)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
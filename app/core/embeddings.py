@@ -2,31 +2,93 @@
 Utility functions for generating embeddings using OpenAI API.
 """
 
+import asyncio
+import base64
+import functools
+import hashlib
 import os
-from typing import List, Optional
-from openai import OpenAI
+import sqlite3
+import sys
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
 
+import httpx
+import orjson
+
+from app.core.config import settings
 from app.core.logging_config import get_logger
+from app.utils.cache import TTLCache
 from app.utils.serializers import normalize_text
 
 logger = get_logger(__name__)
 
 # Configurações dos embeddings
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = "https://api.openai.com/v1"
 EMBEDDING_MODEL = "text-embedding-3-small"
 EMBEDDING_DIMENSIONS = 512
+MAX_INPUT_CHARS = 8000
+
+# Lotes grandes são divididos em sub-lotes (limitados em entradas e em tokens
+# estimados) enviados em paralelo
+EMBEDDING_SUB_BATCH_SIZE = 256
+EMBEDDING_SUB_BATCH_MAX_TOKENS = 280_000
+EMBEDDING_MAX_CONCURRENCY = 8
+
+# Cache de embeddings: em memória e, se configurado, persistido em SQLite
+EMBEDDING_CACHE_TTL = 30 * 24 * 3600
+
+
+@functools.lru_cache(maxsize=4096)
+def _prepare_text(text: str, normalize: bool) -> str:
+    """
+    Normalize (optionally) and truncate a text before embedding it.
+    
+    Memoized, so repeated texts are prepared (and a truncation warned about) only
+    once per process.
+    """
+    if normalize:
+        processed_text = normalize_text(text)
+        logger.debug("Normalized text: '%s' -> '%s'", text, processed_text)
+    else:
+        processed_text = text
+    
+    # Limit text length to avoid API errors
+    if len(processed_text) > MAX_INPUT_CHARS:
+        processed_text = processed_text[:MAX_INPUT_CHARS]
+        logger.warning(f"Text truncated to {MAX_INPUT_CHARS} characters for embedding generation")
+    
+    return processed_text
 
 
 class EmbeddingService:
-    """Service for generating embeddings using OpenAI API"""
+    """
+    Service for generating embeddings using OpenAI API.
+    
+    The embeddings endpoint is called directly over pooled httpx clients, asking for
+    base64-encoded float32 vectors: they decode straight into array('f') without
+    parsing thousands of JSON floats or building SDK models per row.
+    """
     
     def __init__(self):
-        """Initialize OpenAI client"""
-        self.api_key = os.getenv("OPENAI_API_KEY")
+        """Initialize HTTP clients for the OpenAI API"""
+        self.api_key = OPENAI_API_KEY
         if not self.api_key:
             logger.warning("OPENAI_API_KEY not found in environment variables")
             self.client = None
+            self.async_client = None
         else:
-            self.client = OpenAI(api_key=self.api_key, timeout=30)
+            client_options = dict(
+                base_url=OPENAI_BASE_URL,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                timeout=30.0
+            )
+            self.client = httpx.Client(**client_options)
+            self.async_client = httpx.AsyncClient(**client_options)
     
     def generate_embedding(self, text: str, normalize: bool = True) -> Optional[List[float]]:
         """
@@ -48,28 +110,10 @@ class EmbeddingService:
             return None
         
         try:
-            # Normalize text if requested
-            if normalize:
-                processed_text = normalize_text(text)
-                logger.debug(f"Normalized text: '{text}' -> '{processed_text}'")
-            else:
-                processed_text = text
-            
-            # Limit text length to avoid API errors
-            if len(processed_text) > 8000:
-                processed_text = processed_text[:8000]
-                logger.warning(f"Text truncated to 8000 characters for embedding generation")
-            
-            # Generate embedding using OpenAI API
-            response = self.client.embeddings.create(
-                model=EMBEDDING_MODEL,
-                input=processed_text,
-                dimensions=EMBEDDING_DIMENSIONS
-            )
+            processed_text = self._prepare_text(text, normalize)
+            embedding = self._embed([processed_text])[0].tolist()
             
-            embedding = response.data[0].embedding
-            
-            logger.debug(f"Generated embedding with {len(embedding)} dimensions")
+            logger.debug("Generated embedding with %d dimensions", len(embedding))
             return embedding
             
         except Exception as e:
@@ -95,43 +139,295 @@ class EmbeddingService:
             return []
         
         try:
-            # Process texts
-            processed_texts = []
-            for text in texts:
-                if not text or not isinstance(text, str):
-                    processed_texts.append("")
-                    continue
-                
-                if normalize:
-                    processed_text = normalize_text(text)
-                else:
-                    processed_text = text
-                
-                # Limit text length
-                if len(processed_text) > 8000:
-                    processed_text = processed_text[:8000]
-                
-                processed_texts.append(processed_text)
-            
-            # Generate embeddings in batch
-            response = self.client.embeddings.create(
-                model=EMBEDDING_MODEL,
-                input=processed_texts,
-                dimensions=EMBEDDING_DIMENSIONS
-            )
+            processed_texts, unique = self._prepare_batch(texts, normalize)
+            if not unique:
+                return [None] * len(texts)
+
+            # Generate embeddings in batch, one per distinct text
+            unique_embeddings = self._embed(list(unique))
+
+            logger.debug("Generated %d distinct embeddings for %d texts in batch", len(unique), len(texts))
+            return self._scatter(processed_texts, unique, unique_embeddings)
             
-            embeddings = [data.embedding for data in response.data]
+        except Exception as e:
+            logger.error(f"Error generating embeddings batch: {e}")
+            return [None] * len(texts)
+    
+    async def agenerate_embeddings_batch(self, texts: List[str], normalize: bool = True) -> List[Optional[List[float]]]:
+        """
+        Generate embeddings for multiple texts, sending sub-batches concurrently.
+        
+        Async counterpart of generate_embeddings_batch for large jobs: the texts are
+        split into sub-batches of EMBEDDING_SUB_BATCH_SIZE, with at most
+        EMBEDDING_MAX_CONCURRENCY requests in flight.
+        
+        Args:
+            texts: List of texts to generate embeddings for
+            normalize: Whether to normalize texts before generating embeddings
             
-            logger.debug(f"Generated {len(embeddings)} embeddings in batch")
-            return embeddings
+        Returns:
+            List of embeddings (may contain None for failed generations)
+        """
+        if not self.async_client:
+            logger.error("OpenAI client not initialized - check OPENAI_API_KEY")
+            return [None] * len(texts)
+        
+        if not texts:
+            return []
+        
+        try:
+            processed_texts, unique = self._prepare_batch(texts, normalize)
+            if not unique:
+                return [None] * len(texts)
+
+            unique_embeddings = await self._aembed(list(unique))
+
+            logger.debug("Generated %d distinct embeddings for %d texts in async batch", len(unique), len(texts))
+            return self._scatter(processed_texts, unique, unique_embeddings)
             
         except Exception as e:
             logger.error(f"Error generating embeddings batch: {e}")
             return [None] * len(texts)
+    
+    def _prepare_batch(self, texts: List[str], normalize: bool) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Prepare every text and index the distinct non-empty ones.
+        
+        Returns the processed texts (empty string for invalid inputs) and a mapping
+        of each distinct processed text to its position in the request.
+        """
+        processed_texts = [
+            self._prepare_text(text, normalize) if text and isinstance(text, str) else ""
+            for text in texts
+        ]
+
+        # Deduplicate, skipping empty texts (they get None)
+        unique: Dict[str, int] = {}
+        for processed_text in processed_texts:
+            if processed_text and processed_text not in unique:
+                unique[processed_text] = len(unique)
+        return processed_texts, unique
+    
+    @staticmethod
+    def _scatter(
+        processed_texts: List[str],
+        unique: Dict[str, int],
+        unique_embeddings: List[array]
+    ) -> List[Optional[List[float]]]:
+        """Map embeddings of distinct texts back to every original position, as lists."""
+        # A fresh list per position, so duplicated texts never share a mutable row
+        return [
+            unique_embeddings[unique[processed_text]].tolist() if processed_text else None
+            for processed_text in processed_texts
+        ]
+    
+    def _prepare_text(self, text: str, normalize: bool) -> str:
+        """Normalize (optionally) and truncate a text before embedding it."""
+        return _prepare_text(text, normalize)
+    
+    def _embed(self, processed_texts: List[str]) -> List[array]:
+        """Call the embeddings API for already prepared texts, preserving order."""
+        buckets = self._buckets(processed_texts)
+        results = []
+        for bucket in buckets:
+            response = self.client.post(
+                "/embeddings",
+                content=self._request_body([processed_texts[i] for i in bucket])
+            )
+            response.raise_for_status()
+            results.append(self._parse_response(response.content, len(bucket)))
+        return self._unsort(len(processed_texts), buckets, results)
+    
+    async def _aembed(self, processed_texts: List[str]) -> List[array]:
+        """Async _embed: sub-batches are sent concurrently, preserving order."""
+        buckets = self._buckets(processed_texts)
+        semaphore = asyncio.Semaphore(EMBEDDING_MAX_CONCURRENCY)
+
+        async def run(bucket: List[int]) -> List[array]:
+            async with semaphore:
+                response = await self.async_client.post(
+                    "/embeddings",
+                    content=self._request_body([processed_texts[i] for i in bucket])
+                )
+            response.raise_for_status()
+            return self._parse_response(response.content, len(bucket))
+
+        results = await asyncio.gather(*(run(bucket) for bucket in buckets))
+        return self._unsort(len(processed_texts), buckets, results)
+    
+    @staticmethod
+    def _request_body(texts: List[str]) -> bytes:
+        return orjson.dumps({
+            "model": EMBEDDING_MODEL,
+            "input": texts,
+            "dimensions": EMBEDDING_DIMENSIONS,
+            "encoding_format": "base64"
+        })
+    
+    @staticmethod
+    def _parse_response(content: bytes, count: int) -> List[array]:
+        """Decode base64 float32 (little-endian) embeddings, placed by their index."""
+        vectors: List[Optional[array]] = [None] * count
+        for data in orjson.loads(content)["data"]:
+            vector = array("f", base64.b64decode(data["embedding"]))
+            if sys.byteorder == "big":
+                vector.byteswap()
+            vectors[data["index"]] = vector
+        return vectors
+    
+    @staticmethod
+    def _buckets(processed_texts: List[str]) -> List[List[int]]:
+        """
+        Group text indices, sorted by length, into sub-batches for the API.
+        
+        Each sub-batch holds at most EMBEDDING_SUB_BATCH_SIZE texts and about
+        EMBEDDING_SUB_BATCH_MAX_TOKENS tokens (estimated as 4 characters per token),
+        so similar-length texts travel together and requests stay under the API limits.
+        """
+        order = sorted(range(len(processed_texts)), key=lambda i: len(processed_texts[i]))
+        buckets: List[List[int]] = []
+        bucket: List[int] = []
+        bucket_tokens = 0
+        for i in order:
+            tokens = len(processed_texts[i]) // 4 + 1
+            if bucket and (
+                len(bucket) >= EMBEDDING_SUB_BATCH_SIZE
+                or bucket_tokens + tokens > EMBEDDING_SUB_BATCH_MAX_TOKENS
+            ):
+                buckets.append(bucket)
+                bucket, bucket_tokens = [], 0
+            bucket.append(i)
+            bucket_tokens += tokens
+        if bucket:
+            buckets.append(bucket)
+        return buckets
+    
+    @staticmethod
+    def _unsort(
+        count: int,
+        buckets: List[List[int]],
+        results: List[List[array]]
+    ) -> List[array]:
+        """Put per-bucket embeddings back in the original text order."""
+        embeddings: List[Optional[array]] = [None] * count
+        for bucket, bucket_embeddings in zip(buckets, results):
+            for i, embedding in zip(bucket, bucket_embeddings):
+                embeddings[i] = embedding
+        return embeddings
+
+
+class EmbeddingStore:
+    """
+    SQLite-backed persistent store of embeddings, keyed by a digest of the input.
+    
+    Vectors are stored as packed float32, a quarter of the size of JSON floats.
+    """
+    
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+    
+    def get(self, key: bytes) -> Optional[array]:
+        with self._lock:
+            row = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return array("f", row[0])
+    
+    def set_many(self, items: List[Tuple[bytes, array]]) -> None:
+        """Store many vectors in a single transaction (one commit for the batch)."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, vector.tobytes()) for key, vector in items]
+            )
+
+
+class CachedEmbeddingService(EmbeddingService):
+    """
+    EmbeddingService that serves repeated texts from a cache instead of the API.
+    
+    Two tiers: an in-process LRU for hot entries and, when a path is configured,
+    an EmbeddingStore that survives restarts. Only cache misses are sent to the API.
+    
+    Cached vectors are kept as the float32 arrays returned by the API (~2 KB each for
+    512 dimensions, against ~16 KB as a list of Python floats).
+    """
+    
+    def __init__(self, cache_size: int = 10000, store_path: Optional[str] = None):
+        super().__init__()
+        self.memory_cache = TTLCache(maxsize=cache_size, ttl=EMBEDDING_CACHE_TTL)
+        self.store = EmbeddingStore(store_path) if store_path else None
+    
+    @staticmethod
+    def _cache_key(processed_text: str) -> bytes:
+        return hashlib.sha256(
+            f"{EMBEDDING_MODEL}\0{EMBEDDING_DIMENSIONS}\0{processed_text}".encode("utf-8")
+        ).digest()
+    
+    def _lookup(self, key: bytes) -> Optional[array]:
+        vector = self.memory_cache.get(key)
+        if vector is None and self.store is not None:
+            vector = self.store.get(key)
+            if vector is not None:
+                self.memory_cache.set(key, vector)
+        return vector
+    
+    def _embed(self, processed_texts: List[str]) -> List[array]:
+        keys, vectors, misses = self._lookup_all(processed_texts)
+        if misses:
+            fetched = super()._embed([processed_texts[i] for i in misses])
+            self._fill(keys, vectors, misses, fetched)
+        return vectors
+    
+    async def _aembed(self, processed_texts: List[str]) -> List[array]:
+        if self.store is None:
+            keys, vectors, misses = self._lookup_all(processed_texts)
+        else:
+            # SQLite reads and writes block (and share a lock with sync callers),
+            # so they run in a worker thread instead of on the event loop
+            keys, vectors, misses = await asyncio.to_thread(self._lookup_all, processed_texts)
+        if misses:
+            fetched = await super()._aembed([processed_texts[i] for i in misses])
+            if self.store is None:
+                self._fill(keys, vectors, misses, fetched)
+            else:
+                await asyncio.to_thread(self._fill, keys, vectors, misses, fetched)
+        return vectors
+    
+    def _lookup_all(self, processed_texts: List[str]) -> Tuple[List[bytes], List[Optional[array]], List[int]]:
+        """Look every text up, returning keys, cached vectors and positions of misses."""
+        keys = [self._cache_key(text) for text in processed_texts]
+        vectors: List[Optional[array]] = [self._lookup(key) for key in keys]
+        misses = [i for i, vector in enumerate(vectors) if vector is None]
+        logger.debug("Embedding cache: %d hits, %d misses", len(processed_texts) - len(misses), len(misses))
+        return keys, vectors, misses
+    
+    def _fill(
+        self,
+        keys: List[bytes],
+        vectors: List[Optional[array]],
+        misses: List[int],
+        fetched: List[array]
+    ) -> None:
+        """Place fetched embeddings at the miss positions and cache them."""
+        for i, vector in zip(misses, fetched):
+            vectors[i] = vector
+            self.memory_cache.set(keys[i], vector)
+        if self.store is not None:
+            self.store.set_many([(keys[i], vector) for i, vector in zip(misses, fetched)])
 
 
 # Singleton instance
-embedding_service = EmbeddingService()
+embedding_service = CachedEmbeddingService(store_path=settings.EMBEDDING_CACHE_PATH)
 
 
 def generate_description_embedding(description: str) -> Optional[List[float]]:
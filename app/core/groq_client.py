@@ -4,22 +4,51 @@ Evita problemas de incompatibilidade com LangChain
 """
 
 import httpx
-import json
-import asyncio
-from typing import Dict, Any, List, Optional
+import orjson
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from app.core.config import settings
-from app.core.groq_token_manager import get_current_groq_token
+from app.core.groq_token_manager import acquire_groq_token, release_groq_token
 from app.core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+GROQ_MODEL = settings.GROQ_MODEL_NAME
+
+
+def _parse_retry_after(value: Optional[str]) -> float:
+    """Converter o header Retry-After em segundos (padrão: 1s)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class GroqError(Exception):
+    """Falha em uma requisição à API Groq"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+    
+    @property
+    def retryable(self) -> bool:
+        """Falhas transitórias (rede, 429, 5xx); os demais 4xx são erros da própria requisição"""
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
 
 class GroqClient:
     """Cliente customizado para API Groq usando HTTP direto"""
     
     def __init__(self):
-        self.base_url = "https://api.groq.com/openai/v1"
-        self.model = settings.GROQ_MODEL_NAME
+        self.base_url = GROQ_BASE_URL
+        self.model = GROQ_MODEL
+        # Cliente HTTP de longa duração: reutiliza conexões (TCP + TLS) entre requisições
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=120.0,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
         
     async def chat_completion(
         self, 
@@ -38,51 +67,129 @@ class GroqClient:
         Returns:
             Resposta da API Groq
         """
-        token = get_current_groq_token()
+        token = acquire_groq_token()
+        retry_after = None
+        failed = False
+        
+        logger.debug("Fazendo requisição para Groq com modelo: %s", self.model)
+        
+        try:
+            response = await self._client.post(
+                "/chat/completions",
+                headers=self._headers(token),
+                content=self._payload(messages, temperature, max_tokens, stream=False)
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            error, retry_after = self._to_groq_error(e)
+            failed = error.retryable
+            raise error from e
+        finally:
+            release_groq_token(token, retry_after, failed)
+
+        logger.debug("Requisição Groq concluída com sucesso")
+        return orjson.loads(response.content)
+    
+    async def chat_completion_stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Fazer uma requisição de chat completion em streaming (SSE) para o Groq
+        
+        Args:
+            messages: Lista de mensagens no formato [{"role": "user", "content": "..."}]
+            temperature: Temperatura para geração (0-2)
+            max_tokens: Máximo de tokens de resposta
+            
+        Yields:
+            Trechos do conteúdo da resposta, à medida que chegam. Interromper a
+            iteração encerra a requisição e libera o token.
+        """
+        token = acquire_groq_token()
+        retry_after = None
+        failed = False
+        
+        logger.debug("Fazendo requisição em streaming para Groq com modelo: %s", self.model)
         
-        headers = {
+        try:
+            async with self._client.stream(
+                "POST",
+                "/chat/completions",
+                headers=self._headers(token),
+                content=self._payload(messages, temperature, max_tokens, stream=True)
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                response.raise_for_status()
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == "[DONE]":
+                        break
+                    choices = orjson.loads(payload).get("choices")
+                    if choices:
+                        content = choices[0].get("delta", {}).get("content")
+                        if content:
+                            yield content
+        except httpx.HTTPError as e:
+            error, retry_after = self._to_groq_error(e)
+            failed = error.retryable
+            raise error from e
+        finally:
+            release_groq_token(token, retry_after, failed)
+        
+        logger.debug("Streaming Groq concluído com sucesso")
+    
+    def _headers(self, token: str) -> Dict[str, str]:
+        return {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {token}"
         }
-        
-        # Preparar dados da requisição
+    
+    def _payload(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: Optional[int],
+        stream: bool
+    ) -> bytes:
+        """Preparar dados da requisição"""
         data = {
             "model": self.model,
             "messages": messages,
             "temperature": temperature,
-            "stream": False
+            "stream": stream
         }
         
         if max_tokens:
             data["max_tokens"] = max_tokens
-            
-        logger.debug(f"Fazendo requisição para Groq com modelo: {self.model}")
         
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=data
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.debug("Requisição Groq concluída com sucesso")
-                    return result
-                else:
-                    error_msg = f"Erro Groq {response.status_code}: {response.text}"
-                    logger.error(error_msg)
-                    raise Exception(error_msg)
-                    
-            except httpx.TimeoutException:
-                error_msg = "Timeout na requisição para Groq"
-                logger.error(error_msg)
-                raise Exception(error_msg)
-            except Exception as e:
-                error_msg = f"Erro na requisição Groq: {str(e)}"
-                logger.error(error_msg)
-                raise
+        return orjson.dumps(data)
+    
+    @staticmethod
+    def _to_groq_error(e: httpx.HTTPError) -> Tuple[GroqError, Optional[float]]:
+        """Registrar a falha e convertê-la em GroqError, com o Retry-After de um 429"""
+        if isinstance(e, httpx.HTTPStatusError):
+            status_code = e.response.status_code
+            retry_after = None
+            if status_code == 429:
+                retry_after = _parse_retry_after(e.response.headers.get("Retry-After"))
+            logger.error("Erro Groq %d: %s", status_code, e.response.text)
+            return GroqError(f"Erro Groq {status_code}: {e.response.text}", status_code), retry_after
+        if isinstance(e, httpx.TimeoutException):
+            logger.error("Timeout na requisição para Groq")
+            return GroqError("Timeout na requisição para Groq"), None
+        logger.error("Erro na requisição Groq: %s", e)
+        return GroqError(f"Erro na requisição Groq: {e}"), None
+
+    async def aclose(self) -> None:
+        """Fechar o pool de conexões HTTP (usado no shutdown da aplicação)"""
+        await self._client.aclose()
     
     async def simple_completion(self, prompt: str, temperature: float = 0.7) -> str:
         """
@@ -102,7 +209,7 @@ class GroqClient:
         if "choices" in result and len(result["choices"]) > 0:
             return result["choices"][0]["message"]["content"]
         else:
-            raise Exception("Resposta inválida do Groq")
+            raise GroqError("Resposta inválida do Groq")
     
     async def test_connection(self) -> bool:
         """Testar conexão com Groq"""
@@ -124,4 +231,12 @@ def get_groq_client() -> GroqClient:
     global _groq_client
     if _groq_client is None:
         _groq_client = GroqClient()
-    return _groq_client
\ No newline at end of file
+    return _groq_client
+
+
+async def close_groq_client() -> None:
+    """Fechar o cliente Groq, caso tenha sido criado"""
+    global _groq_client
+    if _groq_client is not None:
+        await _groq_client.aclose()
+        _groq_client = None
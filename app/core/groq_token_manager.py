@@ -1,41 +1,107 @@
+from array import array
 from typing import List, Optional
-import itertools
+import logging
 import threading
+import time
 from app.core.logging_config import get_logger
 from app.core.config import settings
 
 logger = get_logger(__name__)
 
+# Saúde de cada token: falhas transitórias (429/5xx/rede) consomem 1 ponto e sucessos
+# devolvem 0.1; um token sem pontos fica pausado por TOKEN_DRAINED_COOLDOWN segundos
+TOKEN_HEALTH_CAPACITY = 5.0
+TOKEN_HEALTH_RECOVERY = 0.1
+TOKEN_DRAINED_COOLDOWN = 30.0
+
 
 class GroqTokenManager:
-    """Gerenciador de tokens GROQ com rotação cíclica"""
+    """Gerenciador de tokens GROQ que escolhe o token menos ocupado a cada requisição"""
     
     def __init__(self, tokens: List[str]):
         if not tokens:
             raise ValueError("Lista de tokens não pode estar vazia")
         
-        self.tokens = [token.strip() for token in tokens if token.strip()]
+        self.tokens = tuple(token.strip() for token in tokens if token.strip())
         if not self.tokens:
             raise ValueError("Nenhum token válido fornecido")
         
-        self.token_cycle = itertools.cycle(self.tokens)
+        self._index = {token: i for i, token in enumerate(self.tokens)}
         self.current_token = None
         self.lock = threading.Lock()
-        self.token_usage_count = {token: 0 for token in self.tokens}
+        self._usage = array("Q", [0] * len(self.tokens))
+        # Requisições em andamento e fim do bloqueio por 429 de cada token
+        self.in_flight = {token: 0 for token in self.tokens}
+        self.blocked_until = {token: 0.0 for token in self.tokens}
+        self.health = {token: TOKEN_HEALTH_CAPACITY for token in self.tokens}
+        self._offset = 0
         
         logger.info(f"GroqTokenManager inicializado com {len(self.tokens)} tokens")
     
-    def get_next_token(self) -> str:
-        """Obtém o próximo token na rotação"""
+    def acquire_token(self) -> str:
+        """
+        Obtém o token menos ocupado, marcando-o como em uso
+        
+        Tokens bloqueados por rate limit (429) só são escolhidos se todos estiverem
+        bloqueados; empates são desfeitos em rotação. Deve ser pareado com release_token.
+        """
+        now = time.monotonic()
+        with self.lock:
+            count = len(self.tokens)
+            candidates = [self.tokens[(self._offset + i) % count] for i in range(count)]
+            token = min(
+                candidates,
+                key=lambda t: (self.blocked_until[t] > now, self.in_flight[t], self.blocked_until[t])
+            )
+            i = self._index[token]
+            self._offset = (i + 1) % count
+            
+            self.current_token = token
+            self.in_flight[token] += 1
+            self._usage[i] += 1
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                masked_token = token[-8:] if len(token) > 8 else "***"
+                logger.debug(
+                    "Usando token ...%s (uso #%d, em andamento: %d)",
+                    masked_token, self._usage[i], self.in_flight[token]
+                )
+            
+            return token
+    
+    def release_token(self, token: str, retry_after: Optional[float] = None, failed: bool = False):
+        """
+        Libera um token obtido com acquire_token
+        
+        Args:
+            token: Token liberado
+            retry_after: Segundos de espera informados pela API após um 429
+            failed: Se a requisição falhou por um erro transitório (429, 5xx, rede);
+                erros da própria requisição (demais 4xx) não contam contra o token
+        """
         with self.lock:
-            self.current_token = next(self.token_cycle)
-            self.token_usage_count[self.current_token] += 1
+            if token not in self.in_flight:
+                return
+            self.in_flight[token] = max(0, self.in_flight[token] - 1)
+            masked_token = token[-8:] if len(token) > 8 else "***"
+            
+            now = time.monotonic()
+            if retry_after is not None:
+                self.blocked_until[token] = max(self.blocked_until[token], now + retry_after)
+                logger.warning(f"Token ...{masked_token} limitado pela API, pausado por {retry_after:.1f}s")
             
-            # Log do uso (apenas os últimos 8 caracteres para segurança)
-            masked_token = self.current_token[-8:] if len(self.current_token) > 8 else "***"
-            logger.debug(f"Usando token ...{masked_token} (uso #{self.token_usage_count[self.current_token]})")
+            if not failed:
+                self.health[token] = min(TOKEN_HEALTH_CAPACITY, self.health[token] + TOKEN_HEALTH_RECOVERY)
+                return
             
-            return self.current_token
+            self.health[token] -= 1.0
+            if self.health[token] <= 0:
+                # Token esgotado: pausar e recomeçar com a capacidade cheia
+                self.blocked_until[token] = max(self.blocked_until[token], now + TOKEN_DRAINED_COOLDOWN)
+                self.health[token] = TOKEN_HEALTH_CAPACITY
+                logger.warning(
+                    f"Token ...{masked_token} com falhas seguidas, pausado por {TOKEN_DRAINED_COOLDOWN:.0f}s"
+                )
     
     def get_current_token(self) -> Optional[str]:
         """Obtém o token atual sem avançar na rotação"""
@@ -44,47 +110,48 @@ class GroqTokenManager:
     def get_token_stats(self) -> dict:
         """Retorna estatísticas de uso dos tokens"""
         with self.lock:
-            total_usage = sum(self.token_usage_count.values())
+            usage = dict(zip(self.tokens, self._usage))
+            total_usage = sum(usage.values())
             return {
                 "total_tokens": len(self.tokens),
                 "total_usage": total_usage,
-                "usage_per_token": dict(self.token_usage_count),
+                "usage_per_token": usage,
+                "in_flight": sum(self.in_flight.values()),
                 "current_token_masked": f"...{self.current_token[-8:]}" if self.current_token else None
             }
     
     def reset_stats(self):
         """Reset das estatísticas de uso"""
         with self.lock:
-            self.token_usage_count = {token: 0 for token in self.tokens}
+            self._usage = array("Q", [0] * len(self.tokens))
             logger.info("Estatísticas de uso dos tokens resetadas")
 
 
-# Singleton instance
-_groq_token_manager = None
-_manager_lock = threading.Lock()
+# Singleton instance, criado na importação: os tokens vêm das configurações,
+# que não mudam durante a execução
+NO_TOKENS_MESSAGE = "Nenhum token GROQ configurado. Configure GROQ_API_KEY ou GROQ_API_TOKENS nas variáveis de ambiente."
+
+try:
+    _groq_token_manager: Optional[GroqTokenManager] = GroqTokenManager(settings.get_groq_tokens())
+except ValueError:
+    _groq_token_manager = None
 
 
 def get_groq_token_manager() -> GroqTokenManager:
     """Obtém a instância singleton do gerenciador de tokens"""
-    global _groq_token_manager
-    
     if _groq_token_manager is None:
-        with _manager_lock:
-            if _groq_token_manager is None:
-                # Obtém tokens das configurações
-                groq_tokens = settings.get_groq_tokens()
-                
-                if not groq_tokens:
-                    raise ValueError("Nenhum token GROQ configurado. Configure GROQ_API_KEY ou GROQ_API_TOKENS nas variáveis de ambiente.")
-                
-                _groq_token_manager = GroqTokenManager(groq_tokens)
-    
+        raise ValueError(NO_TOKENS_MESSAGE)
     return _groq_token_manager
 
 
-def get_current_groq_token() -> str:
-    """Obtém o próximo token GROQ na rotação"""
-    return get_groq_token_manager().get_next_token()
+def acquire_groq_token() -> str:
+    """Obtém o token GROQ menos ocupado; liberar com release_groq_token"""
+    return get_groq_token_manager().acquire_token()
+
+
+def release_groq_token(token: str, retry_after: Optional[float] = None, failed: bool = False):
+    """Libera um token GROQ obtido com acquire_groq_token"""
+    get_groq_token_manager().release_token(token, retry_after, failed)
 
 
 def get_groq_token_stats() -> dict:
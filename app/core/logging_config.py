@@ -1,10 +1,28 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from typing import Optional
 from datetime import datetime
 import os
 
 
+# Listener que grava os logs em segundo plano (ver setup_logging)
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _stop_log_listener():
+    """Esvazia a fila e encerra a thread de escrita dos logs."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+atexit.register(_stop_log_listener)
+
+
 class ColoredFormatter(logging.Formatter):
     """Formatador colorido para logs no terminal."""
     
@@ -18,15 +36,24 @@ class ColoredFormatter(logging.Formatter):
         'RESET': '\033[0m'      # Reset
     }
     
-    def format(self, record):
-        # Adiciona cor baseada no nível
-        color = self.COLORS.get(record.levelname, self.COLORS['RESET'])
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Nomes de nível já coloridos, calculados uma única vez
         reset = self.COLORS['RESET']
-        
-        # Formata o log com cor
-        record.levelname = f"{color}{record.levelname}{reset}"
-        
-        return super().format(record)
+        self._colored = {
+            level: f"{color}{level}{reset}"
+            for level, color in self.COLORS.items() if level != 'RESET'
+        }
+    
+    def format(self, record):
+        # Colore o nível apenas durante a formatação, sem alterar o registro
+        # visto pelos demais handlers
+        levelname = record.levelname
+        record.levelname = self._colored.get(levelname, levelname)
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
 
 
 def setup_logging(
@@ -52,6 +79,7 @@ def setup_logging(
     numeric_level = getattr(logging, log_level.upper(), logging.INFO)
     
     # Remove handlers existentes
+    _stop_log_listener()
     root_logger = logging.getLogger()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
@@ -74,7 +102,7 @@ def setup_logging(
         formatter = logging.Formatter(log_format)
     
     stdout_handler.setFormatter(formatter)
-    root_logger.addHandler(stdout_handler)
+    handlers = [stdout_handler]
     
     # Handler para arquivo (opcional)
     if log_to_file:
@@ -92,15 +120,17 @@ def setup_logging(
             "%(asctime)s - %(name)s - %(levelname)s - %(pathname)s:%(lineno)d - %(message)s"
         )
         file_handler.setFormatter(file_formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
     
-    # Configurações específicas para Docker
-    # Força flush imediato dos logs
-    for handler in root_logger.handlers:
-        handler.setStream(sys.stdout)
-        if hasattr(handler.stream, 'reconfigure'):
-            handler.stream.reconfigure(line_buffering=True)
+    # A escrita (stdout/arquivo) acontece numa thread dedicada; quem loga apenas
+    # enfileira o registro
+    global _log_listener
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
     
+    # Configurações específicas para Docker
     # Desabilita buffering de output para Docker
     sys.stdout.reconfigure(line_buffering=True)
     sys.stderr.reconfigure(line_buffering=True)
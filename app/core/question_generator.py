@@ -1,26 +1,224 @@
-from typing import List, Dict, Any, Optional, TypedDict, Annotated
+from typing import List, Dict, Any, Optional, TypedDict
 from enum import Enum
+import functools
+import hashlib
 import json
-import threading
+import re
+import string
+import orjson
 import asyncio
+import random
+from contextlib import aclosing
 from datetime import datetime
 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langchain_community.tools import DuckDuckGoSearchRun
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
-from langgraph.graph.message import add_messages
 from pydantic import BaseModel, Field
 
 from app.core.config import settings
 from app.core.logging_config import get_logger
-from app.core.groq_token_manager import get_current_groq_token
-from app.core.groq_client import get_groq_client
+from app.core.groq_client import GroqError, get_groq_client
+from app.utils.cache import TTLCache
 from app.schemas.question import Question
 from app.schemas.generated_question import GeneratedQuestionCreate
 from app.schemas.alternative import AlternativeCreate
 
 logger = get_logger(__name__)
 
+# Temperaturas dos rascunhos gerados em paralelo, em ordem de preferência
+DRAFT_TEMPERATURES = (0.5, 0.7, 0.9)
+
+# Termos de busca por disciplina
+DISCIPLINE_TERMS = {
+    "MATEMATICA": "matemática aplicada",
+    "FISICA": "física moderna",
+    "QUIMICA": "química atual",
+    "BIOLOGIA": "biologia contemporânea",
+    "GEOGRAFIA": "geografia atual",
+    "HISTORIA": "história",
+    "PORTUGUES": "língua portuguesa atual"
+}
+
+# Respostas que deveriam trazer JSON são abortadas se nenhum "{" aparecer nesse
+# número de caracteres, em vez de esperar o fim da geração
+JSON_FAIL_FAST_CHARS = 1024
+
+# Prefixo do prompt da nova tentativa quando a resposta não traz um JSON válido
+JSON_RETRY_PREFIX = "Sua resposta anterior não era um JSON válido. Responda APENAS com o JSON válido:\n"
+
+# Cache dos resultados do DuckDuckGo, por query normalizada
+SEARCH_CACHE_TTL = 3600
+
+# Contexto pesquisado por conjunto de keywords + disciplina, reaproveitado entre usuários
+KEYWORD_CONTEXT_CACHE_TTL = 24 * 3600
+
+# Cache das questões geradas, por questão fonte e conjunto de keywords
+GENERATED_QUESTION_CACHE_TTL = 7 * 24 * 3600
+
+
+# Prompts: o texto fixo é montado uma única vez; a cada chamada só os campos
+# dinâmicos são substituídos
+GENERATION_PROMPT_TEMPLATE = string.Template("""
+        Você é um especialista em criação de questões de vestibular do tipo ENEM.
+        
+        CONTEXTO DA PESQUISA ATUAL:
+        $context_research
+        
+        QUESTÃO ORIGINAL COMO REFERÊNCIA DETALHADA:
+        Título: $title
+        Contexto: $context
+        Disciplina: $discipline
+        Ano: $year
+        
+        Alternativas da questão fonte:
+        $alternatives
+        
+        Resposta correta da fonte: $correct_alternative
+        Introdução das alternativas da fonte: $alternatives_introduction
+        Summary da questão fonte: $summary
+        Keywords da questão fonte: $keywords
+        
+        QUESTÕES SIMILARES PARA REFERÊNCIA (EVITE COPIAR):
+        $similar_questions
+        
+        INSTRUÇÕES:
+        1. Crie uma nova questão INÉDITA baseada no contexto atual pesquisado
+        2. A questão deve abordar os mesmos tópicos da questão original, mas com informações ATUAIS
+        3. Use as keywords da questão fonte como guia temático
+        4. Mantenha o mesmo estilo de alternativesIntroduction se relevante
+        5. Crie um summary no mesmo formato da questão fonte
+        6. NÃO faça apenas uma paráfrase da questão original
+        7. Use o contexto da pesquisa para trazer informações recentes e relevantes
+        8. Mantenha a mesma disciplina: $discipline
+        9. Crie exatamente 5 alternativas (A, B, C, D, E)
+        10. Indique claramente qual é a alternativa correta
+        11. Forneça um rationale detalhado para a resposta correta (campo: rationale)
+        12. Use as keywords da fonte como base, mas atualize conforme necessário
+        
+        FORMATO DE RESPOSTA (JSON):
+        {
+            "title": "Título da questão",
+            "context": "Contexto/enunciado completo da questão",
+            "alternatives_introduction": "Texto introdutório das alternativas (baseado na fonte: '$alternatives_introduction')",
+            "alternatives": [
+                {"letter": "A", "text": "Texto da alternativa A"},
+                {"letter": "B", "text": "Texto da alternativa B"},
+                {"letter": "C", "text": "Texto da alternativa C"},
+                {"letter": "D", "text": "Texto da alternativa D"},
+                {"letter": "E", "text": "Texto da alternativa E"}
+            ],
+            "correct_alternative": "A",
+            "rationale": "Explicação detalhada do por que a alternativa correta está certa e as outras estão erradas",
+            "summary": "Resumo da questão (similar ao formato da fonte: '$summary')",
+            "keywords": ["palavra1", "palavra2", "palavra3"]
+        }
+        
+        $response_instructions
+        """)
+
+GENERATION_RESPONSE_INSTRUCTIONS = "RESPONDA APENAS COM O JSON, SEM TEXTO ADICIONAL:"
+
+# Geração em uma única chamada: o modelo rascunha, critica e entrega a versão final
+SINGLE_SHOT_RESPONSE_INSTRUCTIONS = """RESPONDA EM TRÊS PASSOS:
+        Passo 1: escreva um rascunho da questão.
+        Passo 2: critique o rascunho: a questão está clara, as alternativas são consistentes
+        e plausíveis, apenas uma está correta, o rationale está correto e o conteúdo é relevante
+        para o ENEM?
+        Passo 3: corrija os problemas encontrados e escreva SOMENTE o JSON final entre as tags
+        <FINAL> e </FINAL>."""
+
+VALIDATION_PROMPT_TEMPLATE = string.Template("""
+        Você é um validador especialista em questões de vestibular ENEM.
+        
+        QUESTÃO PARA VALIDAÇÃO:
+        Título: $title
+        Contexto: $context
+        
+        Alternativas:
+        $alternatives
+        
+        Resposta correta: $correct_alternative
+        Rationale: $rationale
+        
+        CRITÉRIOS DE VALIDAÇÃO:
+        1. A questão está bem formulada e clara?
+        2. As alternativas são consistentes e do mesmo nível de dificuldade?
+        3. A resposta correta é realmente a única correta?
+        4. As alternativas incorretas são plausíveis mas claramente incorretas?
+        5. O rationale está correto e completo?
+        6. A questão testa conhecimento relevante para o ENEM?
+        
+        RESPONDA:
+        - "APROVADO" se a questão está perfeita
+        - "REFINAMENTO_NECESSÁRIO: [explicação detalhada dos problemas encontrados]" se precisa melhorar
+        
+        SUA AVALIAÇÃO:
+        """)
+
+REFINEMENT_PROMPT_TEMPLATE = string.Template("""
+        Você precisa refinar a questão baseada no feedback de validação.
+        
+        QUESTÃO ATUAL:
+        Título: $title
+        Contexto: $context
+        
+        Alternativas:
+        $alternatives
+        
+        Resposta correta: $correct_alternative
+        Rationale: $rationale
+        
+        FEEDBACK DE VALIDAÇÃO:
+        $validation_feedback
+        
+        INSTRUÇÕES:
+        1. Corrija TODOS os problemas apontados no feedback
+        2. Mantenha a essência da questão, apenas aperfeiçoe
+        3. Garanta que a questão esteja no nível ENEM
+        4. Verifique se todas as alternativas fazem sentido
+        5. Confirme que apenas uma alternativa está correta
+        
+        FORMATO DE RESPOSTA (JSON):
+        {
+            "title": "Título refinado da questão",
+            "context": "Contexto/enunciado refinado",
+            "alternatives_introduction": "Texto introdutório das alternativas (opcional)",
+            "alternatives": [
+                {"letter": "A", "text": "Texto refinado da alternativa A"},
+                {"letter": "B", "text": "Texto refinado da alternativa B"},
+                {"letter": "C", "text": "Texto refinado da alternativa C"},
+                {"letter": "D", "text": "Texto refinado da alternativa D"},
+                {"letter": "E", "text": "Texto refinado da alternativa E"}
+            ],
+            "correct_alternative": "A",
+            "rationale": "Rationale refinado e detalhado",
+            "summary": "Resumo atualizado da questão",
+            "keywords": ["palavra1", "palavra2", "palavra3"]
+        }
+        
+        RESPONDA APENAS COM O JSON REFINADO:
+        """)
+
+
+@functools.lru_cache(maxsize=512)
+def _compose_search_query(discipline: str, keywords: tuple, year: int) -> str:
+    """Monta a query de pesquisa; depende apenas de disciplina, keywords e ano"""
+    # Adicionar disciplina de forma mais específica
+    discipline_term = DISCIPLINE_TERMS.get(discipline, discipline)
+    
+    # Construir query focada e concisa
+    if keywords:
+        # Query com keywords específicas
+        query = f"{' '.join(keywords)} {discipline_term} {year}"
+    else:
+        # Query genérica por disciplina
+        query = f"{discipline_term} novidades {year}"
+    
+    # Limitar tamanho da query
+    return query[:80]  # Máximo 80 caracteres
+
 
 class QuestionGenerationStage(str, Enum):
     """Estágios do processo de geração de questão"""
@@ -42,11 +240,15 @@ class GeneratedQuestionData(BaseModel):
     rationale: str
     summary: Optional[str] = None
     keywords: Optional[List[str]] = None
+    
+    @functools.cached_property
+    def rendered_alternatives(self) -> str:
+        """Alternativas no formato "A) texto", uma por linha, montadas uma única vez"""
+        return "\n".join(f"{alt.letter}) {alt.text}" for alt in self.alternatives)
 
 
 class QuestionGenerationState(TypedDict):
     """Estado do grafo de geração de questão"""
-    messages: Annotated[List[BaseMessage], add_messages]
     stage: QuestionGenerationStage
     source_question: Question
     similar_questions: List[Question]
@@ -56,13 +258,31 @@ class QuestionGenerationState(TypedDict):
     validation_feedback: str
     refinement_count: int
     max_refinements: int
+    skip_validation: bool
     error_message: Optional[str]
 
 
+def _agent_node(method_name: str):
+    """Nó do grafo que delega ao método do agente recebido na config da execução"""
+    async def node(state: QuestionGenerationState, config: RunnableConfig) -> Dict[str, Any]:
+        agent = config["configurable"]["agent"]
+        return await getattr(agent, method_name)(state)
+    
+    node.__name__ = method_name
+    return node
+
+
 class QuestionGeneratorAgent:
     """Agente responsável pela geração de questões usando LangGraph"""
     
-    def __init__(self):
+    _JSON_DECODER = json.JSONDecoder()
+    _MD_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$')
+    
+    def __init__(self, single_shot: Optional[bool] = None):
+        """
+        Args:
+            single_shot: Usar o grafo de chamada única (padrão: QUESTION_GENERATION_SINGLE_SHOT)
+        """
         # Usar cliente Groq customizado
         self.groq_client = get_groq_client()
         
@@ -74,21 +294,37 @@ class QuestionGeneratorAgent:
             logger.error(f"Erro ao inicializar DuckDuckGo: {e}")
             self.search_tool = None
         
-        self.graph = self._build_graph()
+        self._search_cache = TTLCache(maxsize=1024, ttl=SEARCH_CACHE_TTL)
+        # Buscas em andamento, para que queries iguais e simultâneas esperem a mesma
+        self._search_inflight: Dict[str, asyncio.Task] = {}
+        self._kw_context_cache = TTLCache(maxsize=2048, ttl=KEYWORD_CONTEXT_CACHE_TTL)
+        # Entradas: (questão gerada, usuários que já a receberam)
+        self._generation_cache = TTLCache(maxsize=1024, ttl=GENERATED_QUESTION_CACHE_TTL)
+        # Limita as gerações simultâneas; as excedentes aguardam em vez de esgotar os tokens
+        self._generation_semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_GENERATIONS or 8)
+        
+        if single_shot is None:
+            single_shot = settings.QUESTION_GENERATION_SINGLE_SHOT
+        self.single_shot = single_shot
+        self.graph = self._compiled_graph(single_shot)
         
         logger.info(f"QuestionGeneratorAgent inicializado com modelo: {settings.GROQ_MODEL_NAME}")
     
-    def _refresh_token(self):
-        """Atualiza o token GROQ para o próximo na rotação"""
-        try:
-            # Com o cliente customizado, o token é obtido automaticamente
-            logger.info("Token GROQ será atualizado na próxima requisição")
-        except Exception as e:
-            logger.error(f"Erro ao atualizar token GROQ: {e}")
-            raise
-    
-    async def _call_llm_with_retry(self, messages: List[BaseMessage], max_retries: int = 3, temperature: float = 0.7):
-        """Chama o LLM com retry e troca de token em caso de erro"""
+    async def _call_llm_with_retry(
+        self,
+        messages: List[BaseMessage],
+        max_retries: int = 3,
+        temperature: float = 0.7,
+        expect_json: bool = False
+    ):
+        """
+        Chama o LLM com retry em caso de erro
+        
+        A escolha do token a cada tentativa fica com o GroqTokenManager, que pausa
+        tokens com falhas seguidas. Erros da própria requisição (4xx exceto 429)
+        não são repetidos. Com expect_json, a resposta chega em streaming e a
+        tentativa é abortada cedo se o JSON não começar (ver JSON_FAIL_FAST_CHARS).
+        """
         for attempt in range(max_retries):
             try:
                 # Converter BaseMessage para formato dict esperado pelo Groq
@@ -101,6 +337,9 @@ class QuestionGeneratorAgent:
                     else:
                         groq_messages.append({"role": "user", "content": str(msg.content)})
                 
+                if expect_json:
+                    return AIMessage(content=await self._stream_json_completion(groq_messages, temperature))
+                
                 # Fazer requisição para Groq com temperatura personalizada
                 result = await self.groq_client.chat_completion(
                     messages=groq_messages,
@@ -118,45 +357,76 @@ class QuestionGeneratorAgent:
             except Exception as e:
                 logger.warning(f"Erro na tentativa {attempt + 1} de chamada LLM: {e}")
                 
+                if isinstance(e, GroqError) and not e.retryable:
+                    logger.error("Requisição rejeitada pelo Groq; não será repetida")
+                    raise
+                
                 if attempt < max_retries - 1:  # Se não é a última tentativa
-                    logger.info("Tentando com próximo token...")
-                    self._refresh_token()
-                    await asyncio.sleep(1)  # Pequena pausa entre tentativas
+                    logger.info("Tentando novamente...")
+                    # Backoff exponencial com jitter entre tentativas
+                    await asyncio.sleep(2 ** attempt + random.random())
                 else:
                     logger.error("Todas as tentativas falharam")
                     raise
     
-    def _build_graph(self) -> StateGraph:
+    async def _stream_json_completion(self, groq_messages: List[Dict[str, str]], temperature: float) -> str:
+        """Recebe a resposta em streaming, falhando cedo se nenhum JSON começar"""
+        parts = []
+        received = 0
+        json_started = False
+        async with aclosing(self.groq_client.chat_completion_stream(groq_messages, temperature)) as stream:
+            async for chunk in stream:
+                parts.append(chunk)
+                received += len(chunk)
+                if not json_started:
+                    json_started = "{" in chunk
+                    if not json_started and received > JSON_FAIL_FAST_CHARS:
+                        raise ValueError(f"Nenhum JSON nos primeiros {received} caracteres da resposta")
+        return "".join(parts)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _compiled_graph(cls, single_shot: bool):
+        """
+        Grafo compilado compartilhado por todas as instâncias
+        
+        Os nós não guardam a instância: ela é passada a cada execução em
+        config["configurable"]["agent"] (ver generate_question).
+        """
+        return cls._build_single_shot_graph() if single_shot else cls._build_graph()
+    
+    @classmethod
+    def _build_graph(cls) -> StateGraph:
         """Constrói o grafo de estados para geração de questão"""
         workflow = StateGraph(QuestionGenerationState)
         
         # Adicionar nós com nomes únicos
-        workflow.add_node("research_node", self._research_context)
-        workflow.add_node("generation_node", self._generate_question)
-        workflow.add_node("validation_node", self._validate_question)
-        workflow.add_node("refinement_node", self._refine_question)
+        workflow.add_node("research_node", _agent_node("_research_context"))
+        workflow.add_node("parallel_node", _agent_node("_generate_and_validate_parallel"))
+        workflow.add_node("validation_node", _agent_node("_validate_question"))
+        workflow.add_node("refinement_node", _agent_node("_refine_question"))
         
         # Definir fluxo
         workflow.set_entry_point("research_node")
         
-        workflow.add_edge("research_node", "generation_node")
-        workflow.add_edge("generation_node", "validation_node")
-        
-        # Condicionais após validação
-        workflow.add_conditional_edges(
-            "validation_node",
-            self._decide_after_validation,
-            {
-                "refine": "refinement_node",
-                "complete": END,
-                "fail": END
-            }
-        )
+        workflow.add_edge("research_node", "parallel_node")
+        
+        # Condicionais após validação (dos rascunhos ou de uma questão refinada)
+        for node in ("parallel_node", "validation_node"):
+            workflow.add_conditional_edges(
+                node,
+                cls._decide_after_validation,
+                {
+                    "refine": "refinement_node",
+                    "complete": END,
+                    "fail": END
+                }
+            )
         
         # Condicionais após refinamento
         workflow.add_conditional_edges(
             "refinement_node",
-            self._decide_after_refinement,
+            cls._decide_after_refinement,
             {
                 "validate": "validation_node",
                 "fail": END
@@ -165,6 +435,20 @@ class QuestionGeneratorAgent:
         
         return workflow.compile()
     
+    @classmethod
+    def _build_single_shot_graph(cls) -> StateGraph:
+        """Constrói o grafo rápido: pesquisa seguida de uma única chamada ao LLM"""
+        workflow = StateGraph(QuestionGenerationState)
+        
+        workflow.add_node("research_node", _agent_node("_research_context"))
+        workflow.add_node("single_shot_node", _agent_node("_generate_single_shot"))
+        
+        workflow.set_entry_point("research_node")
+        workflow.add_edge("research_node", "single_shot_node")
+        workflow.add_edge("single_shot_node", END)
+        
+        return workflow.compile()
+    
     async def _search_internet(self, query: str) -> str:
         """Realizar busca na internet usando DuckDuckGo"""
         try:
@@ -174,25 +458,43 @@ class QuestionGeneratorAgent:
             
             # Preparar query para busca
             clean_query = " ".join(query.split()[:6])  # Máximo 6 palavras para eficiência
+            cache_key = clean_query.lower()
             
-            logger.info(f"Realizando busca DuckDuckGo para: '{clean_query}'")
-            
-            # Realizar busca com DuckDuckGo
-            search_results = self.search_tool.invoke(clean_query)
-            
-            logger.info(f"DuckDuckGo retornou {len(search_results)} caracteres")
-            
-            if search_results and len(search_results.strip()) > 10:
-                logger.info("Busca DuckDuckGo realizada com sucesso")
-                return f"Resultados da busca DuckDuckGo sobre '{query}':\n{search_results}"
+            search_results = self._search_cache.get(cache_key)
+            if search_results is not None:
+                logger.info(f"Resultados DuckDuckGo em cache para: '{clean_query}'")
             else:
-                logger.warning("Busca DuckDuckGo retornou resultados vazios ou muito curtos")
-                raise Exception("Resultados DuckDuckGo vazios")
+                # Reaproveitar uma busca idêntica que já esteja em andamento
+                task = self._search_inflight.get(cache_key)
+                if task is None:
+                    task = asyncio.ensure_future(self._run_search(clean_query))
+                    self._search_inflight[cache_key] = task
+                    task.add_done_callback(lambda _: self._search_inflight.pop(cache_key, None))
+                search_results = await asyncio.shield(task)
+                self._search_cache.set(cache_key, search_results)
+            
+            return f"Resultados da busca DuckDuckGo sobre '{query}':\n{search_results}"
                 
         except Exception as e:
             logger.error(f"Erro na busca DuckDuckGo: {e}")
             raise Exception(f"Falha na busca DuckDuckGo: {str(e)}")
     
+    async def _run_search(self, clean_query: str) -> str:
+        """Executar a busca no DuckDuckGo, rejeitando resultados vazios"""
+        logger.info(f"Realizando busca DuckDuckGo para: '{clean_query}'")
+        
+        # Realizar busca com DuckDuckGo (chamada bloqueante, fora do event loop)
+        search_results = await asyncio.to_thread(self.search_tool.invoke, clean_query)
+        
+        logger.info(f"DuckDuckGo retornou {len(search_results)} caracteres")
+        
+        if search_results and len(search_results.strip()) > 10:
+            logger.info("Busca DuckDuckGo realizada com sucesso")
+            return search_results
+        else:
+            logger.warning("Busca DuckDuckGo retornou resultados vazios ou muito curtos")
+            raise Exception("Resultados DuckDuckGo vazios")
+    
     async def _research_context(self, state: QuestionGenerationState) -> Dict[str, Any]:
         """Pesquisa contexto atual sobre os tópicos da questão"""
         try:
@@ -201,15 +503,21 @@ class QuestionGeneratorAgent:
             # Construir query de pesquisa baseada na questão original
             search_query = self._build_search_query(source_question)
             
-            # Realizar busca na internet usando DuckDuckGo
-            search_results = "Erro na busca online"
+            # Reaproveitar a pesquisa recente feita para as mesmas keywords e disciplina
+            context_key = frozenset(source_question.keywords or []) | {source_question.discipline.value}
+            search_results = self._kw_context_cache.get(context_key)
             
-            try:
-                search_results = await self._search_internet(search_query)
-                logger.info("Busca DuckDuckGo realizada com sucesso")
-            except Exception as e:
-                logger.error(f"Erro na busca DuckDuckGo: {e}")
-                raise Exception(f"Falha na busca online: {str(e)}")
+            if search_results is not None:
+                logger.info("Contexto de pesquisa em cache para as keywords da questão")
+            else:
+                # Realizar busca na internet usando DuckDuckGo
+                try:
+                    search_results = await self._search_internet(search_query)
+                    logger.info("Busca DuckDuckGo realizada com sucesso")
+                except Exception as e:
+                    logger.error(f"Erro na busca DuckDuckGo: {e}")
+                    raise Exception(f"Falha na busca online: {str(e)}")
+                self._kw_context_cache.set(context_key, search_results)
             
             # Processar resultados da pesquisa
             context_research = f"""
@@ -227,10 +535,7 @@ class QuestionGeneratorAgent:
             
             return {
                 "stage": QuestionGenerationStage.CONTEXT_RESEARCH,
-                "context_research": context_research,
-                "messages": [
-                    HumanMessage(content="Pesquisa de contexto concluída com sucesso.")
-                ]
+                "context_research": context_research
             }
             
         except Exception as e:
@@ -240,32 +545,140 @@ class QuestionGeneratorAgent:
                 "error_message": f"Erro na pesquisa de contexto: {str(e)}"
             }
     
-    async def _generate_question(self, state: QuestionGenerationState) -> Dict[str, Any]:
-        """Gera uma nova questão baseada no contexto pesquisado"""
+    async def _generate_draft(self, prompt: str, temperature: float) -> GeneratedQuestionData:
+        """Gera um rascunho de questão a partir do prompt de geração"""
+        return await self._generate_parsed_question(prompt, temperature)
+    
+    async def _generate_parsed_question(self, prompt: str, temperature: float) -> GeneratedQuestionData:
+        """
+        Chama o LLM e faz o parse da questão em JSON
+        
+        Se a resposta não for um JSON válido, repete uma única vez com um prompt
+        corretivo e temperatura 0, em vez de derrubar o grafo inteiro.
+        """
+        response = await self._call_llm_with_retry(
+            [HumanMessage(content=prompt)],
+            temperature=temperature,
+            expect_json=True
+        )
+        try:
+            return self._parse_generated_question(response.content)
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Resposta sem JSON válido; repetindo com prompt corretivo")
+        
+        response = await self._call_llm_with_retry(
+            [HumanMessage(content=JSON_RETRY_PREFIX + prompt)],
+            temperature=0.0,
+            expect_json=True
+        )
+        return self._parse_generated_question(response.content)
+    
+    async def _validate_draft(self, generated_question: GeneratedQuestionData) -> str:
+        """Obtém o feedback de validação de uma questão"""
+        validation_prompt = self._build_validation_prompt(generated_question)
+        
+        # Usar temperatura baixa para validação - mais determinística
+        response = await self._call_llm_with_retry(
+            [HumanMessage(content=validation_prompt)],
+            temperature=0.2  # Baixa variabilidade para validação consistente
+        )
+        return response.content
+    
+    async def _generate_single_shot(self, state: QuestionGenerationState) -> Dict[str, Any]:
+        """Gera, critica e finaliza a questão em uma única chamada ao LLM"""
         try:
-            source_question = state["source_question"]
-            similar_questions = state["similar_questions"]
-            context_research = state["context_research"]
-            
             prompt = self._build_generation_prompt(
-                source_question, similar_questions, context_research
+                state["source_question"],
+                state["similar_questions"],
+                state["context_research"],
+                response_instructions=SINGLE_SHOT_RESPONSE_INSTRUCTIONS
             )
+            response = await self._call_llm_with_retry([HumanMessage(content=prompt)], temperature=0.7)
+            
+            # Usar apenas o trecho final; sem as tags, o JSON é procurado na resposta toda
+            content = response.content
+            start = content.rfind("<FINAL>")
+            if start != -1:
+                end = content.find("</FINAL>", start)
+                content = content[start + len("<FINAL>"):end if end != -1 else None]
+            
+            return {
+                "stage": QuestionGenerationStage.GENERATION,
+                "generated_question": self._parse_generated_question(content)
+            }
             
-            # Tentar gerar com retry de token em caso de erro - temperatura alta para criatividade
-            response = await self._call_llm_with_retry(
-                [HumanMessage(content=prompt)], 
-                temperature=0.7  # Alta criatividade para geração
+        except Exception as e:
+            logger.error(f"Erro na geração da questão: {e}")
+            return {
+                "stage": QuestionGenerationStage.FAILED,
+                "error_message": f"Erro na geração da questão: {str(e)}"
+            }
+    
+    @staticmethod
+    def _is_approved(validation_feedback: str) -> bool:
+        """Indica se o feedback do validador aprova a questão"""
+        return validation_feedback.strip().lstrip('"*').upper().startswith("APROVADO")
+    
+    @staticmethod
+    def _needs_refinement(validation_feedback: str) -> bool:
+        """Indica se o validador pediu refinamento da questão"""
+        return validation_feedback.strip().lstrip('"*').upper().startswith("REFINAMENTO_NECESSÁRIO")
+    
+    async def _generate_and_validate_parallel(self, state: QuestionGenerationState) -> Dict[str, Any]:
+        """
+        Gera e valida vários rascunhos em paralelo, um por temperatura
+        
+        Retorna o primeiro rascunho aprovado assim que ele ficar pronto, cancelando
+        os demais. Se nenhum for aprovado, segue com o rascunho de menor temperatura
+        (e seu feedback) para refinamento. Com skip_validation, o primeiro rascunho
+        gerado é aceito sem validação.
+        """
+        try:
+            prompt = self._build_generation_prompt(
+                state["source_question"], state["similar_questions"], state["context_research"]
             )
+            skip_validation = state.get("skip_validation", False)
             
-            # Parse da resposta para extrair a questão gerada
-            generated_question = self._parse_generated_question(response.content)
+            async def draft_and_validate(index: int, temperature: float):
+                draft = await self._generate_draft(prompt, temperature)
+                feedback = "" if skip_validation else await self._validate_draft(draft)
+                return index, draft, feedback
             
+            tasks = [
+                asyncio.create_task(draft_and_validate(i, t))
+                for i, t in enumerate(DRAFT_TEMPERATURES)
+            ]
+            results = {}
+            errors = []
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    try:
+                        index, draft, feedback = await next_done
+                    except Exception as e:
+                        logger.warning(f"Rascunho descartado: {e}")
+                        errors.append(e)
+                        continue
+                    
+                    if skip_validation or self._is_approved(feedback):
+                        logger.info(f"Rascunho aprovado (temperatura {DRAFT_TEMPERATURES[index]})")
+                        return {
+                            "stage": QuestionGenerationStage.VALIDATION,
+                            "generated_question": draft,
+                            "validation_feedback": feedback
+                        }
+                    results[index] = (draft, feedback)
+            finally:
+                for task in tasks:
+                    task.cancel()
+            
+            if not results:
+                raise Exception(f"Nenhum rascunho gerado: {errors[0] if errors else 'sem resposta'}")
+            
+            draft, feedback = results[min(results)]
             return {
-                "stage": QuestionGenerationStage.GENERATION,
-                "generated_question": generated_question,
-                "messages": [
-                    AIMessage(content="Questão gerada com sucesso.")
-                ]
+                "stage": QuestionGenerationStage.VALIDATION,
+                "generated_question": draft,
+                "validation_feedback": feedback
             }
             
         except Exception as e:
@@ -285,22 +698,11 @@ class QuestionGeneratorAgent:
                     "error_message": "Nenhuma questão foi gerada para validar"
                 }
             
-            validation_prompt = self._build_validation_prompt(generated_question)
-            
-            # Usar temperatura baixa para validação - mais determinística
-            response = await self._call_llm_with_retry(
-                [HumanMessage(content=validation_prompt)],
-                temperature=0.2  # Baixa variabilidade para validação consistente
-            )
-            
-            validation_feedback = response.content
+            validation_feedback = await self._validate_draft(generated_question)
             
             return {
                 "stage": QuestionGenerationStage.VALIDATION,
-                "validation_feedback": validation_feedback,
-                "messages": [
-                    AIMessage(content="Validação da questão concluída.")
-                ]
+                "validation_feedback": validation_feedback
             }
             
         except Exception as e:
@@ -322,21 +724,15 @@ class QuestionGeneratorAgent:
             )
             
             # Usar temperatura baixa para refinamento - mais preciso e determinístico
-            response = await self._call_llm_with_retry(
-                [HumanMessage(content=refinement_prompt)],
+            refined_question = await self._generate_parsed_question(
+                refinement_prompt,
                 temperature=0.2  # Baixa variabilidade para refinamento consistente
             )
             
-            # Parse da questão refinada
-            refined_question = self._parse_generated_question(response.content)
-            
             return {
                 "stage": QuestionGenerationStage.REFINEMENT,
                 "generated_question": refined_question,
-                "refinement_count": refinement_count + 1,
-                "messages": [
-                    AIMessage(content=f"Questão refinada (tentativa {refinement_count + 1}).")
-                ]
+                "refinement_count": refinement_count + 1
             }
             
         except Exception as e:
@@ -346,17 +742,26 @@ class QuestionGeneratorAgent:
                 "error_message": f"Erro no refinamento da questão: {str(e)}"
             }
     
-    def _decide_after_validation(self, state: QuestionGenerationState) -> str:
+    @classmethod
+    def _decide_after_validation(cls, state: QuestionGenerationState) -> str:
         """Decide próximo passo após validação"""
-        # Simplificar: sempre completar após primeira validação se a questão foi gerada
         generated_question = state.get("generated_question")
+        if generated_question is None:
+            return "fail"
         
-        if generated_question is not None:
+        # Refinar apenas quando o validador pediu e ainda há tentativas
+        validation_feedback = state.get("validation_feedback", "")
+        if state.get("skip_validation") or cls._is_approved(validation_feedback):
             return "complete"
-        else:
-            return "fail"
+        if (
+            cls._needs_refinement(validation_feedback)
+            and state.get("refinement_count", 0) < state.get("max_refinements", 3)
+        ):
+            return "refine"
+        return "complete"
     
-    def _decide_after_refinement(self, state: QuestionGenerationState) -> str:
+    @staticmethod
+    def _decide_after_refinement(state: QuestionGenerationState) -> str:
         """Decide próximo passo após refinamento"""
         refinement_count = state.get("refinement_count", 0)
         max_refinements = state.get("max_refinements", 3)
@@ -369,38 +774,15 @@ class QuestionGeneratorAgent:
     def _build_search_query(self, question: Question) -> str:
         """Constrói query de pesquisa otimizada baseada na questão"""
         # Extrair palavras-chave mais importantes (máximo 3)
-        keywords = []
-        if question.keywords:
-            keywords.extend(question.keywords[:3])
-        
-        # Adicionar disciplina de forma mais específica
-        discipline_terms = {
-            "MATEMATICA": "matemática aplicada",
-            "FISICA": "física moderna",
-            "QUIMICA": "química atual",
-            "BIOLOGIA": "biologia contemporânea", 
-            "GEOGRAFIA": "geografia atual",
-            "HISTORIA": "história",
-            "PORTUGUES": "língua portuguesa atual"
-        }
-        
-        discipline_term = discipline_terms.get(question.discipline.value, question.discipline.value)
-        
-        # Construir query focada e concisa
-        current_year = datetime.now().year
-        
-        if keywords:
-            # Query com keywords específicas
-            query = f"{' '.join(keywords)} {discipline_term} {current_year}"
-        else:
-            # Query genérica por disciplina
-            query = f"{discipline_term} novidades {current_year}"
-        
-        # Limitar tamanho da query
-        return query[:80]  # Máximo 80 caracteres
+        keywords = tuple(question.keywords[:3]) if question.keywords else ()
+        return _compose_search_query(question.discipline.value, keywords, datetime.now().year)
     
     def _build_generation_prompt(
-        self, source_question: Question, similar_questions: List[Question], context_research: str
+        self,
+        source_question: Question,
+        similar_questions: List[Question],
+        context_research: str,
+        response_instructions: str = GENERATION_RESPONSE_INSTRUCTIONS
     ) -> str:
         """Constrói prompt para geração da questão"""
         similar_questions_text = "\n\n".join([
@@ -409,197 +791,79 @@ class QuestionGeneratorAgent:
         ])
         
         # Extrair informações detalhadas da questão fonte
-        source_correct_alt = getattr(source_question, 'correctAlternative', 'N/A')
-        source_summary = getattr(source_question, 'summary', 'N/A')
-        source_alt_intro = getattr(source_question, 'alternativesIntroduction', 'N/A')
-        source_keywords = getattr(source_question, 'keywords', [])
-        source_alternatives = getattr(source_question, 'alternatives', [])
-        
-        # Formatar alternativas da questão fonte
-        source_alternatives_text = ""
-        if source_alternatives:
-            source_alternatives_text = "\n".join([
-                f"{alt.letter}) {alt.text}" for alt in source_alternatives
-            ])
-        
-        return f"""
-        Você é um especialista em criação de questões de vestibular do tipo ENEM.
-        
-        CONTEXTO DA PESQUISA ATUAL:
-        {context_research}
-        
-        QUESTÃO ORIGINAL COMO REFERÊNCIA DETALHADA:
-        Título: {source_question.title}
-        Contexto: {source_question.context or 'Sem contexto específico'}
-        Disciplina: {source_question.discipline}
-        Ano: {source_question.year}
-        
-        Alternativas da questão fonte:
-        {source_alternatives_text}
-        
-        Resposta correta da fonte: {source_correct_alt}
-        Introdução das alternativas da fonte: {source_alt_intro}
-        Summary da questão fonte: {source_summary}
-        Keywords da questão fonte: {', '.join(source_keywords) if source_keywords else 'N/A'}
-        
-        QUESTÕES SIMILARES PARA REFERÊNCIA (EVITE COPIAR):
-        {similar_questions_text}
-        
-        INSTRUÇÕES:
-        1. Crie uma nova questão INÉDITA baseada no contexto atual pesquisado
-        2. A questão deve abordar os mesmos tópicos da questão original, mas com informações ATUAIS
-        3. Use as keywords da questão fonte como guia temático
-        4. Mantenha o mesmo estilo de alternativesIntroduction se relevante
-        5. Crie um summary no mesmo formato da questão fonte
-        6. NÃO faça apenas uma paráfrase da questão original
-        7. Use o contexto da pesquisa para trazer informações recentes e relevantes
-        8. Mantenha a mesma disciplina: {source_question.discipline}
-        9. Crie exatamente 5 alternativas (A, B, C, D, E)
-        10. Indique claramente qual é a alternativa correta
-        11. Forneça um rationale detalhado para a resposta correta (campo: rationale)
-        12. Use as keywords da fonte como base, mas atualize conforme necessário
-        
-        FORMATO DE RESPOSTA (JSON):
-        {{
-            "title": "Título da questão",
-            "context": "Contexto/enunciado completo da questão",
-            "alternatives_introduction": "Texto introdutório das alternativas (baseado na fonte: '{source_alt_intro}')",
-            "alternatives": [
-                {{"letter": "A", "text": "Texto da alternativa A"}},
-                {{"letter": "B", "text": "Texto da alternativa B"}},
-                {{"letter": "C", "text": "Texto da alternativa C"}},
-                {{"letter": "D", "text": "Texto da alternativa D"}},
-                {{"letter": "E", "text": "Texto da alternativa E"}}
-            ],
-            "correct_alternative": "A",
-            "rationale": "Explicação detalhada do por que a alternativa correta está certa e as outras estão erradas",
-            "summary": "Resumo da questão (similar ao formato da fonte: '{source_summary}')",
-            "keywords": ["palavra1", "palavra2", "palavra3"]
-        }}
+        source = source_question.model_dump(
+            include={'correctAlternative', 'summary', 'alternativesIntroduction', 'keywords'}
+        )
+        source_correct_alt = source.get('correctAlternative', 'N/A')
+        source_summary = source.get('summary', 'N/A')
+        source_alt_intro = source.get('alternativesIntroduction', 'N/A')
+        source_keywords = source.get('keywords') or []
+        
+        # Formatar alternativas da questão fonte (campo obrigatório do schema)
+        source_alternatives_text = "\n".join([
+            f"{alt.letter}) {alt.text}" for alt in source_question.alternatives or []
+        ])
         
-        RESPONDA APENAS COM O JSON, SEM TEXTO ADICIONAL:
-        """
+        return GENERATION_PROMPT_TEMPLATE.substitute(
+            context_research=context_research,
+            title=source_question.title,
+            context=source_question.context or 'Sem contexto específico',
+            discipline=format(source_question.discipline),
+            year=source_question.year,
+            alternatives=source_alternatives_text,
+            correct_alternative=source_correct_alt,
+            alternatives_introduction=source_alt_intro,
+            summary=source_summary,
+            keywords=', '.join(source_keywords) if source_keywords else 'N/A',
+            similar_questions=similar_questions_text,
+            response_instructions=response_instructions
+        )
     
     def _build_validation_prompt(self, generated_question: GeneratedQuestionData) -> str:
         """Constrói prompt para validação da questão"""
-        return f"""
-        Você é um validador especialista em questões de vestibular ENEM.
-        
-        QUESTÃO PARA VALIDAÇÃO:
-        Título: {generated_question.title}
-        Contexto: {generated_question.context}
-        
-        Alternativas:
-        {chr(10).join([f"{alt.letter}) {alt.text}" for alt in generated_question.alternatives])}
-        
-        Resposta correta: {generated_question.correct_alternative}
-        Rationale: {generated_question.rationale}
-        
-        CRITÉRIOS DE VALIDAÇÃO:
-        1. A questão está bem formulada e clara?
-        2. As alternativas são consistentes e do mesmo nível de dificuldade?
-        3. A resposta correta é realmente a única correta?
-        4. As alternativas incorretas são plausíveis mas claramente incorretas?
-        5. O rationale está correto e completo?
-        6. A questão testa conhecimento relevante para o ENEM?
-        
-        RESPONDA:
-        - "APROVADO" se a questão está perfeita
-        - "REFINAMENTO_NECESSÁRIO: [explicação detalhada dos problemas encontrados]" se precisa melhorar
-        
-        SUA AVALIAÇÃO:
-        """
+        return VALIDATION_PROMPT_TEMPLATE.substitute(
+            title=generated_question.title,
+            context=generated_question.context,
+            alternatives=generated_question.rendered_alternatives,
+            correct_alternative=generated_question.correct_alternative,
+            rationale=generated_question.rationale
+        )
     
     def _build_refinement_prompt(
         self, generated_question: GeneratedQuestionData, validation_feedback: str
     ) -> str:
         """Constrói prompt para refinamento da questão"""
-        return f"""
-        Você precisa refinar a questão baseada no feedback de validação.
-        
-        QUESTÃO ATUAL:
-        Título: {generated_question.title}
-        Contexto: {generated_question.context}
-        
-        Alternativas:
-        {chr(10).join([f"{alt.letter}) {alt.text}" for alt in generated_question.alternatives])}
-        
-        Resposta correta: {generated_question.correct_alternative}
-        Rationale: {generated_question.rationale}
-        
-        FEEDBACK DE VALIDAÇÃO:
-        {validation_feedback}
-        
-        INSTRUÇÕES:
-        1. Corrija TODOS os problemas apontados no feedback
-        2. Mantenha a essência da questão, apenas aperfeiçoe
-        3. Garanta que a questão esteja no nível ENEM
-        4. Verifique se todas as alternativas fazem sentido
-        5. Confirme que apenas uma alternativa está correta
-        
-        FORMATO DE RESPOSTA (JSON):
-        {{
-            "title": "Título refinado da questão",
-            "context": "Contexto/enunciado refinado",
-            "alternatives_introduction": "Texto introdutório das alternativas (opcional)",
-            "alternatives": [
-                {{"letter": "A", "text": "Texto refinado da alternativa A"}},
-                {{"letter": "B", "text": "Texto refinado da alternativa B"}},
-                {{"letter": "C", "text": "Texto refinado da alternativa C"}},
-                {{"letter": "D", "text": "Texto refinado da alternativa D"}},
-                {{"letter": "E", "text": "Texto refinado da alternativa E"}}
-            ],
-            "correct_alternative": "A",
-            "rationale": "Rationale refinado e detalhado",
-            "summary": "Resumo atualizado da questão",
-            "keywords": ["palavra1", "palavra2", "palavra3"]
-        }}
-        
-        RESPONDA APENAS COM O JSON REFINADO:
-        """
+        return REFINEMENT_PROMPT_TEMPLATE.substitute(
+            title=generated_question.title,
+            context=generated_question.context,
+            alternatives=generated_question.rendered_alternatives,
+            correct_alternative=generated_question.correct_alternative,
+            rationale=generated_question.rationale,
+            validation_feedback=validation_feedback
+        )
     
     def _parse_generated_question(self, response_content: str) -> GeneratedQuestionData:
         """Parse da resposta do LLM para extrair dados da questão"""
         try:
-            # Limpar resposta para extrair apenas o JSON
-            cleaned_content = response_content.strip()
-            
-            # Remover diferentes tipos de marcação markdown
-            if cleaned_content.startswith("```json"):
-                cleaned_content = cleaned_content[7:]
-            elif cleaned_content.startswith("```"):
-                cleaned_content = cleaned_content[3:]
-                
-            if cleaned_content.endswith("```"):
-                cleaned_content = cleaned_content[:-3]
-            
-            # Limpar espaços extras
-            cleaned_content = cleaned_content.strip()
+            # Limpar resposta e remover marcação markdown (```json ... ```)
+            cleaned_content = self._MD_FENCE_RE.sub("", response_content.strip())
             
-            # Tentar encontrar o JSON válido - procurar por chaves balanceadas
+            # O JSON começa na primeira chave
             start_idx = cleaned_content.find('{')
             if start_idx == -1:
                 raise ValueError("Nenhum JSON encontrado na resposta")
             
-            # Contar chaves para encontrar onde o JSON termina
-            brace_count = 0
-            end_idx = start_idx
-            for i, char in enumerate(cleaned_content[start_idx:], start_idx):
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_idx = i + 1
-                        break
-            
-            # Extrair apenas o JSON válido
-            json_content = cleaned_content[start_idx:end_idx]
-            
             # Debug: log do conteúdo JSON extraído
-            logger.debug(f"JSON extraído: {json_content[:200]}...")
+            logger.debug("JSON extraído: %s...", cleaned_content[start_idx:start_idx + 200])
             
-            data = json.loads(json_content)
+            try:
+                data = orjson.loads(cleaned_content[start_idx:])
+            except orjson.JSONDecodeError:
+                # Mais chaves abertas que fechadas: resposta truncada, nem tenta o raw_decode
+                if cleaned_content.count('{', start_idx) > cleaned_content.count('}', start_idx):
+                    raise ValueError("JSON incompleto na resposta (chaves não fechadas)")
+                # Há texto após o objeto: raw_decode para no fim dele
+                data, _ = self._JSON_DECODER.raw_decode(cleaned_content, start_idx)
             
             # Converter alternativas para o formato correto
             correct_letter = data["correct_alternative"].upper()
@@ -633,12 +897,33 @@ class QuestionGeneratorAgent:
         source_question: Question,
         similar_questions: List[Question],
         user_id: str,
-        max_refinements: int = 3
+        max_refinements: int = 3,
+        skip_validation: bool = False,
+        fresh: bool = False
     ) -> Dict[str, Any]:
-        """Gera uma nova questão baseada na questão original"""
+        """
+        Gera uma nova questão baseada na questão original
+        
+        Com skip_validation=True a etapa de validação (e, portanto, o refinamento)
+        é pulada, economizando chamadas ao LLM em fluxos sensíveis à latência.
+        Uma questão gerada para a mesma fonte pode ser reaproveitada para outro
+        usuário; quem já a recebeu, ou pede fresh=True, ganha uma geração nova.
+        """
         try:
+            cache_key = self._generation_cache_key(source_question)
+            cached = None if fresh else self._generation_cache.get(cache_key)
+            if cached is not None:
+                cached_data, served_users = cached
+                if user_id not in served_users:
+                    served_users.add(user_id)
+                    logger.info(f"Questão gerada em cache para a fonte {source_question.id}")
+                    return {
+                        "success": True,
+                        "generated_question": self._to_generated_question_create(cached_data, source_question, user_id),
+                        "refinement_count": 0
+                    }
+            
             initial_state = QuestionGenerationState(
-                messages=[],
                 stage=QuestionGenerationStage.CONTEXT_RESEARCH,
                 source_question=source_question,
                 similar_questions=similar_questions,
@@ -648,11 +933,15 @@ class QuestionGeneratorAgent:
                 validation_feedback="",
                 refinement_count=0,
                 max_refinements=max_refinements,
+                skip_validation=skip_validation,
                 error_message=None
             )
             
             # Executar o grafo
-            final_state = await self.graph.ainvoke(initial_state)
+            async with self._generation_semaphore:
+                final_state = await self.graph.ainvoke(
+                    initial_state, config={"configurable": {"agent": self}}
+                )
             
             if final_state["stage"] == QuestionGenerationStage.FAILED:
                 return {
@@ -668,23 +957,9 @@ class QuestionGeneratorAgent:
                     "error": "Nenhuma questão foi gerada"
                 }
             
-            generated_question = GeneratedQuestionCreate(
-                title=generated_data.title,
-                index=1,  # Será ajustado no serviço
-                discipline=source_question.discipline,
-                language=source_question.language,
-                year=datetime.now().year,
-                context=generated_data.context,
-                correctAlternative=generated_data.correct_alternative,
-                alternativesIntroduction=generated_data.alternatives_introduction,
-                alternatives=generated_data.alternatives,
-                summary=generated_data.summary,
-                keywords=generated_data.keywords,
-                questionTopics=source_question.questionTopics,
-                user=user_id,
-                rationale=generated_data.rationale,
-                source_question_id=source_question.id
-            )
+            generated_question = self._to_generated_question_create(generated_data, source_question, user_id)
+            # A nova geração substitui a anterior, já servida a este usuário
+            self._generation_cache.set(cache_key, (generated_data, {user_id}))
             
             return {
                 "success": True,
@@ -699,23 +974,47 @@ class QuestionGeneratorAgent:
                 "error": f"Erro na geração da questão: {str(e)}"
             }
 
+    
+    @staticmethod
+    def _generation_cache_key(source_question: Question) -> str:
+        """Chave do cache de geração: questão fonte + hash das keywords (sem ordem)"""
+        keywords = ",".join(sorted(source_question.keywords or []))
+        digest = hashlib.blake2b(keywords.encode("utf-8"), digest_size=8).hexdigest()
+        return f"genq:{source_question.id}:{digest}"
+    
+    @staticmethod
+    def _to_generated_question_create(
+        generated_data: GeneratedQuestionData, source_question: Question, user_id: str
+    ) -> GeneratedQuestionCreate:
+        """Converte a questão gerada para o formato de criação"""
+        return GeneratedQuestionCreate(
+            title=generated_data.title,
+            index=1,  # Será ajustado no serviço
+            discipline=source_question.discipline,
+            language=source_question.language,
+            year=datetime.now().year,
+            context=generated_data.context,
+            correctAlternative=generated_data.correct_alternative,
+            alternativesIntroduction=generated_data.alternatives_introduction,
+            alternatives=generated_data.alternatives,
+            summary=generated_data.summary,
+            keywords=generated_data.keywords,
+            questionTopics=source_question.questionTopics,
+            user=user_id,
+            rationale=generated_data.rationale,
+            source_question_id=source_question.id
+        )
+
 
-# Singleton instance - lazy initialization
-_question_generator = None
-_generator_lock = threading.Lock()
+# Singleton instance - criada no primeiro uso, para não montar o DuckDuckGo e o
+# cliente Groq durante o import em workers que nunca geram questões
+_question_generator: Optional[QuestionGeneratorAgent] = None
 
 
 def get_question_generator() -> QuestionGeneratorAgent:
-    """Obtém a instância singleton do gerador de questões (lazy initialization)"""
+    """Obtém a instância singleton do gerador de questões"""
     global _question_generator
-    
+    # Chamado apenas no event loop e a construção não tem await, então não há corrida
     if _question_generator is None:
-        with _generator_lock:
-            if _question_generator is None:
-                _question_generator = QuestionGeneratorAgent()
-    
+        _question_generator = QuestionGeneratorAgent()
     return _question_generator
-
-
-# Para compatibilidade com código existente
-question_generator = get_question_generator
\ No newline at end of file
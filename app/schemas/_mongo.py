@@ -0,0 +1,12 @@
+"""
+Configuração compartilhada pelos schemas que espelham documentos do MongoDB.
+"""
+
+from bson import ObjectId
+from pydantic import ConfigDict
+
+# datetime fica com o serializador ISO 8601 nativo do pydantic
+MONGO_CONFIG = ConfigDict(
+    arbitrary_types_allowed=True,
+    json_encoders={ObjectId: str}
+)
@@ -0,0 +1,25 @@
+"""
+Tipos compartilhados para campos que guardam ObjectId como string.
+"""
+
+import re
+from typing import Annotated, Any
+
+from bson import ObjectId
+from pydantic import BeforeValidator
+
+# Mesmo critério de ObjectId.is_valid para strings: 24 dígitos hexadecimais
+OID_RE = re.compile(r'^[0-9a-fA-F]{24}\Z').match
+
+
+def to_str_oid(v: Any) -> str:
+    """Aceita um ObjectId ou sua forma hexadecimal e retorna a string."""
+    if isinstance(v, str) and OID_RE(v):
+        return v
+    if isinstance(v, ObjectId):
+        return str(v)
+    raise ValueError(f"Invalid ObjectId: {v}")
+
+
+# ObjectId do MongoDB como string
+UserIdStr = Annotated[str, BeforeValidator(to_str_oid)]
@@ -0,0 +1,18 @@
+"""
+Tipos anotados reutilizados pelos schemas de questões.
+"""
+
+from typing import Annotated, Any, Literal
+
+from pydantic import BeforeValidator, Field
+
+
+def _upper(v: Any) -> Any:
+    return v.upper() if isinstance(v, str) else v
+
+
+# Letra da alternativa, aceita em minúscula e normalizada para maiúscula
+AlternativeLetter = Annotated[Literal['A', 'B', 'C', 'D', 'E'], BeforeValidator(_upper)]
+
+# Ano da prova; o ENEM começou em 1998
+EnemYear = Annotated[int, Field(ge=1998)]
@@ -1,17 +1,27 @@
+from functools import lru_cache
 from typing import List, Optional, Dict, Any, Annotated
 from datetime import datetime
 from pydantic import BaseModel, Field, BeforeValidator, ConfigDict
 from bson import ObjectId
 
+from ._mongo import MONGO_CONFIG
+from ._objectid import OID_RE
+
+
+@lru_cache(maxsize=4096)
+def _oid_from_str(s: str) -> ObjectId:
+    """Parse a hex string into an ObjectId, reusing recent results."""
+    return ObjectId(s)
+
 
 def validate_object_id(v: Any) -> ObjectId:
     """Validate ObjectId from string or ObjectId."""
     if isinstance(v, ObjectId):
         return v
     if isinstance(v, str):
-        if not ObjectId.is_valid(v):
+        if not OID_RE(v):
             raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
+        return _oid_from_str(v)
     raise ValueError("Invalid ObjectId format")
 
 
@@ -25,10 +35,7 @@ class MessageModel(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow, description="When the message was sent")
     metadata: Optional[Dict[str, Any]] = Field(default=None, description="Additional message metadata")
 
-    model_config = ConfigDict(
-        json_encoders={ObjectId: str},
-        arbitrary_types_allowed=True
-    )
+    model_config = MONGO_CONFIG
 
 
 class ConversationModel(BaseModel):
@@ -43,11 +50,7 @@ class ConversationModel(BaseModel):
     is_active: bool = Field(default=True, description="Whether the conversation is active")
     metadata: Optional[Dict[str, Any]] = Field(default=None, description="Additional conversation metadata")
 
-    model_config = ConfigDict(
-        populate_by_name=True,
-        arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str}
-    )
+    model_config = ConfigDict(**MONGO_CONFIG, populate_by_name=True)
 
 
 # Request/Response schemas for API
@@ -57,6 +60,12 @@ class OpenConversationRequest(BaseModel):
     structured_output: bool = Field(default=False, description="Whether to return structured JSON response")
 
 
+class OpenConversationBatchRequest(BaseModel):
+    question_ids: List[str] = Field(..., min_length=1, max_length=20, description="IDs of the ENEM questions to start conversations with")
+    user_id: str = Field(..., description="User identifier")
+    structured_output: bool = Field(default=False, description="Whether to return structured JSON responses")
+
+
 class OpenConversationResponse(BaseModel):
     session_id: str = Field(..., description="Generated session ID for the conversation")
     conversation_id: str = Field(..., description="MongoDB conversation document ID")
@@ -66,6 +75,13 @@ class OpenConversationResponse(BaseModel):
     created_at: datetime = Field(..., description="When the conversation was created")
 
 
+class OpenConversationBatchItem(BaseModel):
+    question_id: str = Field(..., description="ID of the ENEM question")
+    success: bool = Field(..., description="Whether the conversation was created")
+    data: Optional[OpenConversationResponse] = Field(default=None, description="Created conversation, when successful")
+    error: Optional[str] = Field(default=None, description="Error message, when the conversation could not be created")
+
+
 class AddMessageRequest(BaseModel):
     session_id: str = Field(..., description="Session ID of the conversation")
     user_id: str = Field(..., description="User identifier")
@@ -80,6 +96,8 @@ class AddMessageResponse(BaseModel):
     agent_response: str = Field(..., description="Agent's response")
     timestamp: datetime = Field(..., description="When the message was processed")
 
+    model_config = ConfigDict(frozen=True, extra='forbid', from_attributes=True)
+
 
 class ConversationHistoryResponse(BaseModel):
     conversation_id: str = Field(..., description="MongoDB conversation document ID")
@@ -1,5 +1,5 @@
 from typing import Optional, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ConfigDict
 from fastapi import UploadFile
 
 
@@ -53,11 +53,15 @@ class DocumentRecoverRequest(BaseModel):
     url: str = Field(..., description="URL do documento para download")
     name: Optional[str] = Field(None, description="Nome do arquivo")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class DocumentDeleteRequest(BaseModel):
     """Schema para request de exclusão de documento"""
     url: str = Field(..., description="URL do documento para exclusão")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 # Schemas de resposta
 class DocumentListResponse(BaseModel):
@@ -68,6 +72,8 @@ class DocumentListResponse(BaseModel):
     page: int
     pageSize: int
 
+    model_config = ConfigDict(frozen=True, extra='forbid', from_attributes=True)
+
 
 class DocumentResponse(BaseModel):
     """Schema para resposta de operação com documento único"""
@@ -2,8 +2,10 @@ from typing import List, Optional, Union, Any
 from datetime import datetime
 from enum import Enum
 
-from pydantic import BaseModel, Field, validator
-from bson import ObjectId
+from pydantic import BaseModel, Field, ConfigDict
+
+from ._mongo import MONGO_CONFIG
+from ._objectid import UserIdStr
 
 
 class ExamStatus(str, Enum):
@@ -19,33 +21,21 @@ class ExamQuestion(BaseModel):
     correct_answer: str  # A, B, C, D, E
     is_correct: Optional[bool] = None
     
-    class Config:
-        json_encoders = {
-            ObjectId: str
-        }
+    model_config = MONGO_CONFIG
 
 
 class ExamBase(BaseModel):
     """Campos base do exame"""
-    user_id: str  # ObjectId do usuário no MongoDB como string
+    user_id: UserIdStr  # ObjectId do usuário no MongoDB como string
     total_questions: int
     status: ExamStatus = ExamStatus.NOT_STARTED
     
-    @validator('user_id', pre=True)
-    def validate_user_id(cls, v):
-        if isinstance(v, ObjectId):
-            return str(v)
-        if isinstance(v, str) and ObjectId.is_valid(v):
-            return v
-        raise ValueError(f"Invalid ObjectId: {v}")
-    
-    class Config:
-        arbitrary_types_allowed = True
+    model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
 class ExamCreate(BaseModel):
     """Dados para criação do exame"""
-    user_id: Optional[str] = None  # Será preenchido automaticamente no backend
+    user_id: Optional[UserIdStr] = None  # Será preenchido automaticamente no backend
     topics: Optional[List[str]] = None
     exam_replic_id: Optional[str] = Field(default=None, alias='examReplicId')
     years: Optional[List[int]] = None
@@ -53,19 +43,10 @@ class ExamCreate(BaseModel):
     question_count: int = Field(default=25, ge=1, le=100)
     description: Optional[str] = Field(default=None, max_length=1000, description="Descrição em linguagem natural do tipo de simulado desejado")
     
-    @validator('user_id', pre=True, always=True)
-    def validate_user_id(cls, v):
-        if v is None:
-            return None  # Será preenchido no backend
-        if isinstance(v, ObjectId):
-            return str(v)
-        if isinstance(v, str) and ObjectId.is_valid(v):
-            return v
-        raise ValueError(f"Invalid ObjectId: {v}")
-    
-    class Config:
-        arbitrary_types_allowed = True
-        populate_by_name = True  # Pydantic V2: renamed from allow_population_by_field_name
+    model_config = ConfigDict(
+        arbitrary_types_allowed=True,
+        populate_by_name=True
+    )
 
 
 class ExamUpdate(BaseModel):
@@ -89,17 +70,13 @@ class Exam(ExamBase):
     updated_at: datetime
     finished_at: Optional[datetime] = None
     
-    class Config:
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = MONGO_CONFIG
 
 
 class ExamSummary(BaseModel):
     """Resumo do exame para listagem"""
     id: str
-    user_id: str  # ObjectId do usuário no MongoDB como string
+    user_id: UserIdStr  # ObjectId do usuário no MongoDB como string
     total_questions: int
     answered_questions: int = 0  # Contador de questões respondidas (para exames em progresso)
     total_correct_answers: int
@@ -109,20 +86,7 @@ class ExamSummary(BaseModel):
     updated_at: datetime
     finished_at: Optional[datetime] = None
     
-    @validator('user_id', pre=True)
-    def validate_user_id(cls, v):
-        if isinstance(v, ObjectId):
-            return str(v)
-        if isinstance(v, str) and ObjectId.is_valid(v):
-            return v
-        raise ValueError(f"Invalid ObjectId: {v}")
-    
-    class Config:
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = MONGO_CONFIG
 
 
 class ExamDetails(Exam):
@@ -136,6 +100,15 @@ class ExamResponse(BaseModel):
     status: ExamStatus
     message: str
 
+    model_config = ConfigDict(frozen=True, extra='forbid', from_attributes=True)
+
+
+class AlternativeForExam(BaseModel):
+    """Alternativa exibida no exame (sem isCorrect)"""
+    letter: str
+    text: Optional[str] = None
+    base64File: Optional[str] = None
+
 
 class QuestionForExam(BaseModel):
     """Questão formatada para exibição no exame (sem gabarito)"""
@@ -144,12 +117,9 @@ class QuestionForExam(BaseModel):
     discipline: str
     context: str
     alternatives_introduction: Optional[str] = None
-    alternatives: List[dict]  # Inclui base64File de cada alternativa, mas sem isCorrect
+    alternatives: List[AlternativeForExam]
     
-    class Config:
-        json_encoders = {
-            ObjectId: str
-        }
+    model_config = MONGO_CONFIG
 
 
 class ExamForUser(BaseModel):
@@ -161,8 +131,4 @@ class ExamForUser(BaseModel):
     questions: List[QuestionForExam]
     created_at: datetime
     
-    class Config:
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda v: v.isoformat()
-        }
\ No newline at end of file
+    model_config = MONGO_CONFIG
\ No newline at end of file
@@ -1,9 +1,9 @@
-from typing import Optional, List, Any
-from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List
+from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
 
-from .question import QuestionBase, Question, DisciplineType
-from .alternative import Alternative, AlternativeCreate
+from .question import QuestionBase, Question, DisciplineType, _OptionalQuestionFields
+from .alternative import AlternativeCreate
 
 
 class GeneratedQuestionBase(QuestionBase):
@@ -19,37 +19,10 @@ class GeneratedQuestionCreate(GeneratedQuestionBase):
     alternatives: List[AlternativeCreate] = Field(..., min_items=5, max_items=5, description="Exatamente 5 alternativas")
 
 
-class GeneratedQuestionUpdate(BaseModel):
+class GeneratedQuestionUpdate(_OptionalQuestionFields):
     """Schema para atualização de GeneratedQuestion"""
-    title: Optional[str] = Field(None, min_length=1)
-    discipline: Optional[DisciplineType] = None
-    language: Optional[str] = None
-    year: Optional[int] = Field(None, gt=0)
-    context: Optional[str] = None
-    files: Optional[List[Any]] = None
-    base64Files: Optional[List[str]] = None
-    correctAlternative: Optional[str] = Field(None, min_length=1)
-    alternativesIntroduction: Optional[str] = None
-    alternatives: Optional[List[Alternative]] = None
-    summary: Optional[str] = None
-    keywords: Optional[List[str]] = None
-    questionTopics: Optional[List[str]] = None
     rationale: Optional[str] = Field(None, min_length=1)
 
-    @field_validator('year')
-    @classmethod
-    def validate_year(cls, v):
-        if v is not None and v < 1998:
-            raise ValueError('Ano deve ser 1998 ou posterior')
-        return v
-
-    @field_validator('correctAlternative')
-    @classmethod
-    def validate_correct_alternative(cls, v):
-        if v is not None and v.upper() not in ['A', 'B', 'C', 'D', 'E']:
-            raise ValueError('Alternativa correta deve ser A, B, C, D ou E')
-        return v.upper() if v is not None else v
-
 
 class GeneratedQuestion(GeneratedQuestionBase):
     """Schema para retorno de GeneratedQuestion via API"""
@@ -73,6 +46,7 @@ class GeneratedQuestionQuery(BaseModel):
 class GenerateQuestionRequest(BaseModel):
     """Schema para solicitação de geração de questão"""
     question_id: str = Field(..., description="ID da questão base para geração")
+    fresh: bool = Field(False, description="Ignorar questões geradas anteriormente para a mesma fonte")
 
 
 # Schemas de resposta
@@ -84,6 +58,8 @@ class GeneratedQuestionListResponse(BaseModel):
     page: int
     pageSize: int
 
+    model_config = ConfigDict(frozen=True, extra='forbid', from_attributes=True)
+
 
 class GeneratedQuestionResponse(BaseModel):
     """Schema para resposta de operação com questão gerada única"""
@@ -1,8 +1,9 @@
 from typing import Optional, List, Any
 from enum import Enum
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, ConfigDict
 from bson import ObjectId
 
+from ._types import AlternativeLetter, EnemYear
 from .alternative import Alternative, AlternativeCreate
 
 
@@ -22,63 +23,43 @@ class QuestionBase(BaseModel):
     index: int = Field(..., gt=0, description="Índice da questão")
     discipline: DisciplineType = Field(..., description="Disciplina da questão")
     language: Optional[str] = Field(None, description="Idioma da questão")
-    year: int = Field(..., gt=0, description="Ano da prova")
+    year: EnemYear = Field(..., description="Ano da prova")
     context: Optional[str] = Field(None, description="Contexto da questão")
     files: Optional[List[Any]] = Field(None, description="Arquivos relacionados")
     base64Files: Optional[List[str]] = Field(None, description="Arquivos em base64")
-    correctAlternative: str = Field(..., min_length=1, description="Alternativa correta")
+    correctAlternative: AlternativeLetter = Field(..., description="Alternativa correta")
     alternativesIntroduction: Optional[str] = Field(None, description="Introdução das alternativas")
     alternatives: List[Alternative] = Field(..., min_items=1, description="Lista de alternativas")
     summary: Optional[str] = Field(None, description="Resumo da questão")
     keywords: Optional[List[str]] = Field(None, description="Palavras-chave")
     questionTopics: Optional[List[str]] = Field(None, description="IDs dos tópicos relacionados")
 
-    @validator('year')
-    def validate_year(cls, v):
-        if v < 1998:  # ENEM começou em 1998
-            raise ValueError('Ano deve ser 1998 ou posterior')
-        return v
-
-    @validator('correctAlternative')
-    def validate_correct_alternative(cls, v):
-        if v.upper() not in ['A', 'B', 'C', 'D', 'E']:
-            raise ValueError('Alternativa correta deve ser A, B, C, D ou E')
-        return v.upper()
-
 
 class QuestionCreate(QuestionBase):
     """Schema para criação de Question"""
     alternatives: List[AlternativeCreate] = Field(..., min_items=1, description="Lista de alternativas para criação")
 
 
-class QuestionUpdate(BaseModel):
-    """Schema para atualização de Question"""
+class _OptionalQuestionFields(BaseModel):
+    """Campos opcionais comuns aos schemas de atualização de questões"""
     title: Optional[str] = Field(None, min_length=1)
-    index: Optional[int] = Field(None, gt=0)
     discipline: Optional[DisciplineType] = None
     language: Optional[str] = None
-    year: Optional[int] = Field(None, gt=0)
+    year: Optional[EnemYear] = None
     context: Optional[str] = None
     files: Optional[List[Any]] = None
     base64Files: Optional[List[str]] = None
-    correctAlternative: Optional[str] = Field(None, min_length=1)
+    correctAlternative: Optional[AlternativeLetter] = None
     alternativesIntroduction: Optional[str] = None
     alternatives: Optional[List[Alternative]] = None
     summary: Optional[str] = None
     keywords: Optional[List[str]] = None
     questionTopics: Optional[List[str]] = None
 
-    @validator('year')
-    def validate_year(cls, v):
-        if v is not None and v < 1998:
-            raise ValueError('Ano deve ser 1998 ou posterior')
-        return v
 
-    @validator('correctAlternative')
-    def validate_correct_alternative(cls, v):
-        if v is not None and v.upper() not in ['A', 'B', 'C', 'D', 'E']:
-            raise ValueError('Alternativa correta deve ser A, B, C, D ou E')
-        return v.upper() if v is not None else v
+class QuestionUpdate(_OptionalQuestionFields):
+    """Schema para atualização de Question"""
+    index: Optional[int] = Field(None, gt=0)
 
 
 class Question(QuestionBase):
@@ -104,16 +85,22 @@ class AnalyzeImageRequest(BaseModel):
     imageUrl: str = Field(..., description="URL da imagem para análise")
     prompt: str = Field("What's in this image?", description="Prompt para análise")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class SummarizeQuestionsRequest(BaseModel):
     """Schema para sumarização de questões"""
     questionIds: List[str] = Field(..., min_items=1, description="IDs das questões para sumarizar")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class QuestionImportRequest(BaseModel):
     """Schema para importação de questões"""
     questions: List[QuestionCreate] = Field(..., min_items=1, description="Lista de questões para importar")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 # Schemas de resposta
 class QuestionListResponse(BaseModel):
@@ -124,6 +111,8 @@ class QuestionListResponse(BaseModel):
     page: int
     pageSize: int
 
+    model_config = ConfigDict(frozen=True, extra='forbid', from_attributes=True)
+
 
 class QuestionResponse(BaseModel):
     """Schema para resposta de operação com questão única"""
@@ -1,5 +1,5 @@
 from typing import Optional, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ConfigDict
 
 
 class QuestionTopicBase(BaseModel):
@@ -53,6 +53,8 @@ class ClassifyUnusedTopicsRequest(BaseModel):
     """Schema para classificação de tópicos não utilizados"""
     limit: Optional[int] = Field(None, ge=1, description="Limite de tópicos para processar")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 # Schemas de resposta
 class QuestionTopicListResponse(BaseModel):
@@ -30,6 +30,14 @@ class User(UserBase):
     name: str
 
 
+# Propriedades resumidas para listagem de usuários
+class UserListItem(BaseModel):
+    id: str = Field(..., description="ObjectId do usuário")
+    email: EmailStr
+    name: str
+    is_active: Optional[bool] = True
+
+
 # Schema para resposta de login
 class Token(BaseModel):
     access_token: str
@@ -1,9 +1,9 @@
 from typing import List, Optional, Dict, Any, Type, TypeVar
-from pymongo import MongoClient
 from bson import ObjectId
 from pydantic import BaseModel
 
 from app.core.config import settings
+from app.core.database import get_mongo_client
 from app.core.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -36,7 +36,7 @@ class MongoService:
             if not settings.DATABASE_NAME:
                 raise ValueError("DATABASE_NAME não configurado")
                 
-            self._client = MongoClient(settings.MONGODB_CONNECTION_STRING)
+            self._client = get_mongo_client()
             self._db = self._client[settings.DATABASE_NAME]
             self._collection = self._db[self.collection_name]
             
@@ -107,6 +107,7 @@ class MongoService:
         limit: int = 100,
         sort_by: str = "_id",
         sort_order: int = 1,
+        projection: Optional[Dict[str, Any]] = None,
         **filters
     ) -> List[Dict[str, Any]]:
         """Obter múltiplos documentos"""
@@ -114,7 +115,7 @@ class MongoService:
             collection = self._get_collection()
             mongo_filter = self._prepare_filter(**filters)
             
-            cursor = collection.find(mongo_filter)
+            cursor = collection.find(mongo_filter, projection)
             
             # Aplicar ordenação
             cursor = cursor.sort(sort_by, sort_order)
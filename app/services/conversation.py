@@ -1,6 +1,5 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from pymongo import MongoClient
 from bson import ObjectId
 import os
 from dotenv import load_dotenv
@@ -8,6 +7,7 @@ from dotenv import load_dotenv
 from app.schemas.conversation import ConversationModel, MessageModel
 from app.core.logging_config import get_logger
 from app.core.config import settings
+from app.core.database import close_mongo_client, get_mongo_client
 from app.utils.serializers import serialize_mongodb_doc
 
 load_dotenv()
@@ -23,7 +23,7 @@ class ConversationService:
         # MongoDB Client
         logger.info(f"🗄️ Conectando ao MongoDB: {self.database_name}")
         logger.info(f"Connection String: {self.connection_string[:50]}..." if len(self.connection_string) > 50 else self.connection_string)
-        self.client = MongoClient(self.connection_string)
+        self.client = get_mongo_client()
         self.db = self.client[self.database_name]
         self.collection = self.db[self.conversations_collection]
         
@@ -71,7 +71,7 @@ class ConversationService:
         )
         
         # Insert into MongoDB
-        conversation_dict = conversation.dict(by_alias=True, exclude={"id"})
+        conversation_dict = conversation.model_dump(by_alias=True, exclude={"id"})
         result = self.collection.insert_one(conversation_dict)
         conversation.id = result.inserted_id
         
@@ -135,7 +135,7 @@ class ConversationService:
             result = self.collection.update_one(
                 {"session_id": session_id},
                 {
-                    "$push": {"messages": message.dict()},
+                    "$push": {"messages": message.model_dump()},
                     "$set": {"updated_at": datetime.utcnow()}
                 }
             )
@@ -290,13 +290,13 @@ class ConversationService:
             return {}
     
     def close_connection(self):
-        """Close MongoDB connection."""
-        if self.client:
-            self.client.close()
-    
-    def __del__(self):
-        """Cleanup when service is destroyed."""
-        self.close_connection()
+        """
+        Close the shared MongoDB pool.
+
+        The client is the process-wide pool used by every service and the agent,
+        so this delegates to close_mongo_client() (normally called only on shutdown).
+        """
+        close_mongo_client()
 
 
 # Global service instance
@@ -1,7 +1,7 @@
 from typing import List, Optional, Dict, Any
 from bson import ObjectId
 
-from app.schemas.user import User, UserCreate, UserUpdate
+from app.schemas.user import User, UserCreate, UserUpdate, UserListItem
 from app.utils.security import get_password_hash, verify_password
 from app.services.base import MongoService
 from app.core.logging_config import get_logger
@@ -46,6 +46,19 @@ class UserService(MongoService):
             logger.error(f"Erro ao buscar usuários: {e}")
             return []
 
+    def get_multi_summary(self, *, skip: int = 0, limit: int = 100) -> List[UserListItem]:
+        """Obter múltiplos usuários projetando apenas os campos da listagem"""
+        try:
+            docs = super().get_multi(
+                skip=skip,
+                limit=limit,
+                projection={"email": 1, "name": 1, "is_active": 1},
+            )
+            return [UserListItem(**doc) for doc in docs]
+        except Exception as e:
+            logger.error(f"Erro ao buscar usuários: {e}")
+            return []
+
     def create(self, *, obj_in: UserCreate) -> User:
         """Criar um novo usuário"""
         try:
@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+
+class TokenBucketLimiter:
+    """
+    Rate limiter em memória baseado em token bucket, indexado por chave.
+
+    Cada chave possui um balde com capacidade `capacity` que é reabastecido
+    continuamente à taxa de `capacity / period` tokens por segundo.
+    """
+
+    def __init__(self, capacity: int, period: float, max_keys: int = 10000):
+        """
+        Args:
+            capacity: Número máximo de requisições permitidas por período
+            period: Período de reabastecimento completo do balde, em segundos
+            max_keys: Número máximo de chaves mantidas em memória
+        """
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.max_keys = max_keys
+        # Ordem de uso mais recente por último: o início guarda os baldes mais reabastecidos
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: str = "") -> bool:
+        """Consumir um token da chave, retornando False se o balde estiver vazio"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+
+            if key not in self._buckets and len(self._buckets) >= self.max_keys:
+                self._evict(now)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            return allowed
+
+    def retry_after(self, key: str = "") -> int:
+        """Segundos estimados até a chave ter um token disponível"""
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.capacity, time.monotonic()))
+        elapsed = time.monotonic() - last
+        missing = 1.0 - min(self.capacity, tokens + elapsed * self.rate)
+        return max(1, int(missing / self.rate) + 1) if missing > 0 else 0
+
+    def _evict(self, now: float) -> None:
+        """
+        Abrir espaço para uma nova chave
+
+        Remove do início (menos recentes) os baldes já totalmente reabastecidos, que
+        equivalem a uma chave nova. Se nenhum estiver cheio, remove apenas o menos
+        recente; baldes ainda limitando uma chave nunca são descartados em massa.
+        """
+        while self._buckets:
+            key, (tokens, last) = next(iter(self._buckets.items()))
+            if tokens + (now - last) * self.rate < self.capacity:
+                break
+            del self._buckets[key]
+        while len(self._buckets) >= self.max_keys:
+            self._buckets.popitem(last=False)
@@ -3,6 +3,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.api import api_router
+from app.core.agent import init_agent_db, init_agent_llm
+from app.core.database import close_mongo_client
+from app.core.groq_client import close_groq_client
 from app.core.config import settings
 from app.core.logging_config import setup_production_logging, setup_development_logging, get_logger
 
@@ -30,11 +33,15 @@ async def startup_event():
     logger.info(f"📝 Log Level: {settings.LOG_LEVEL}")
     logger.info(f"🤖 Google Model: {settings.GOOGLE_MODEL_NAME}")
     logger.info(f"🗄️ Database: {settings.DATABASE_NAME}")
+    await init_agent_db()
+    await init_agent_llm()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Evento executado no encerramento da aplicação."""
     logger.info(f"🛑 Encerrando {settings.PROJECT_NAME}")
+    close_mongo_client()
+    await close_groq_client()
 
 # Configurar CORS - Modo permissivo para desenvolvimento
 logger.info("🌐 Configurando CORS em modo permissivo para desenvolvimento")
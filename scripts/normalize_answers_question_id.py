@@ -0,0 +1,35 @@
+"""
+Migração única: normaliza answers_data.question_id para ObjectId.
+
+Documentos antigos guardam question_id como string; convertê-los permite que a
+busca de fontes use uma única forma de chave no índice de question_id.
+
+Uso:
+    PYTHONPATH=. poetry run python scripts/normalize_answers_question_id.py
+"""
+
+from pymongo import MongoClient
+
+from app.core.config import settings
+
+ANSWERS_DATA_COLLECTION = "answers_data"
+
+
+def main() -> None:
+    client = MongoClient(settings.MONGODB_CONNECTION_STRING)
+    collection = client[settings.DATABASE_NAME][ANSWERS_DATA_COLLECTION]
+
+    collection.create_index("question_id")
+
+    # Apenas strings hexadecimais de 24 caracteres são ObjectIds válidos
+    result = collection.update_many(
+        {"question_id": {"$type": "string", "$regex": "^[0-9a-fA-F]{24}$"}},
+        [{"$set": {"question_id": {"$toObjectId": "$question_id"}}}],
+    )
+    print(f"Documentos convertidos: {result.modified_count}")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main()